@@ -1,10 +1,15 @@
-from fastapi import FastAPI, HTTPException, File, UploadFile, Form
+from fastapi import FastAPI, HTTPException, File, UploadFile, Form, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import os
+import json
+import time
+import asyncio
+import hashlib
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -12,10 +17,53 @@ load_dotenv()
 
 from services.vector_service import VectorService
 from services.pinecone_service import PineconeService
-from models.lab_models import LabMatch, UserQuery, UserQueryWithFile
+from services.catalog_service import CatalogService, MATCH_NOTHING_FILTER
+from services.result_cache import RankedResultCache, InvalidCursorError
+from services.singleflight import SingleFlight, SingleFlightTimeout
+from services.suggest_service import SuggestService
+from services.admission import AdmissionController, AdmissionMiddleware, AdmissionPool
+from services.ingest_service import IngestJobManager, lab_id_error, parse_lab_line
+from services.index_registry import IndexRegistry
+from services.index_versions import IndexVersionManager
+from models.lab_models import (
+    IndexBuildRequest, IngestJobStatus, IngestRecordError, LabInfo, LabMatch, SearchFilters, UserQuery,
+    UserQueryWithFile
+)
 
 app = FastAPI(title="UM Robotics Lab Match API", version="1.0.0")
 
+# Admission control: expensive resume searches and ingestion get their own
+# bounded pools so they cannot starve keyword searches. The landing page,
+# static files and health check are never queued or shed.
+admission = AdmissionController([
+    AdmissionPool(
+        "search",
+        max_concurrency=int(os.getenv("SEARCH_MAX_CONCURRENCY", "16")),
+        max_queue_seconds=float(os.getenv("SEARCH_MAX_QUEUE_SECONDS", "0.5"))
+    ),
+    AdmissionPool(
+        "resume",
+        max_concurrency=int(os.getenv("RESUME_MAX_CONCURRENCY", "4")),
+        max_queue_seconds=float(os.getenv("RESUME_MAX_QUEUE_SECONDS", "3")),
+        initial_service_seconds=3.0
+    ),
+    AdmissionPool(
+        "ingest",
+        max_concurrency=int(os.getenv("INGEST_MAX_CONCURRENCY", "2")),
+        max_queue_seconds=float(os.getenv("INGEST_MAX_QUEUE_SECONDS", "1"))
+    ),
+])
+admission.route("POST", r"/api/search-labs", "search")
+admission.route("GET", r"/api/search-labs/next", "search")
+admission.route("GET", r"/api/suggest", "search")
+admission.route("GET", r"/api/labs/[^/]+/similar", "search")
+admission.route("POST", r"/api/search-labs-with-resume(/stream)?", "resume")
+admission.route("POST", r"/api/add-lab", "ingest")
+admission.route("POST", r"/api/labs/bulk", "ingest")
+admission.route("POST", r"/api/admin/.*", "ingest")
+
+app.add_middleware(AdmissionMiddleware, controller=admission)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -23,11 +71,176 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Retry-After"],
 )
 
 # Initialize services
 vector_service = VectorService()
 pinecone_service = PineconeService()
+catalog_service = CatalogService()
+index_registry = IndexRegistry()
+index_manager = IndexVersionManager(
+    index_registry,
+    pinecone_service,
+    catalog_service,
+    vector_service,
+    shadow_sample_rate=float(os.getenv("SHADOW_SAMPLE_RATE", "0.1"))
+)
+result_cache = RankedResultCache()
+suggest_service = SuggestService(index_manager.live_vector_service(), catalog_service)
+
+
+def on_labs_ingested(labs: List[LabInfo], vectors_by_version: Dict[str, List[Any]]):
+    """Refresh the catalogue and every written index version's neighbour graph after labs are upserted"""
+    catalog_service.add_labs(labs)
+    index_manager.update_graphs({
+        name: {lab.id: vector for lab, vector in zip(labs, vectors)} for name, vectors in vectors_by_version.items()
+    })
+
+
+ingest_jobs = IngestJobManager(index_manager.upsert_labs, on_ingested=on_labs_ingested)
+search_flight = SingleFlight(timeout=float(os.getenv("SEARCH_TIMEOUT_SECONDS", "30")))
+
+# Length of the ranked id list fetched per search; later pages are served from it
+RANKED_LIST_SIZE = 200
+MAX_PAGE_SIZE = 50
+
+# Number of results hydrated per chunk when streaming resume search results
+STREAM_HYDRATE_CHUNK = 5
+
+SUGGEST_REBUILD_SECONDS = float(os.getenv("SUGGEST_REBUILD_SECONDS", "3600"))
+MAX_BULK_RECORDS = int(os.getenv("MAX_BULK_RECORDS", "10000"))
+MAX_BULK_LINE_BYTES = int(os.getenv("MAX_BULK_LINE_BYTES", "65536"))
+
+# Ids fetched per Pinecone request when backfilling from the live index
+BACKFILL_FETCH_SIZE = 100
+
+
+def parse_form_list(value: Optional[str]) -> List[str]:
+    """Parse a comma-separated form field into a list of values"""
+    if not value:
+        return []
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def hydrate_matches(ranked: List[Tuple[str, float]]) -> List[LabMatch]:
+    """Attach lab details to ranked ids, from the catalogue where possible"""
+    labs = {lab_id: catalog_service.get_lab(lab_id) for lab_id, _ in ranked}
+    missing = [lab_id for lab_id, lab in labs.items() if lab is None]
+    if missing:
+        labs.update(pinecone_service.fetch_labs(missing, namespace=index_manager.live()["namespace"]))
+
+    matches = []
+    for lab_id, score in ranked:
+        lab = labs.get(lab_id)
+        if lab is None:
+            continue
+        matches.append(LabMatch(lab=lab, similarity_score=max(0.0, min(1.0, score))))
+    return matches
+
+
+def paginate(
+    ranked: List[Tuple[str, float]], page_size: int, response: Response, key: Optional[str] = None, offset: int = 0
+) -> List[LabMatch]:
+    """
+    Hydrate one page of a ranked list and set X-Next-Cursor when more results remain
+    """
+    next_offset = offset + page_size
+    if next_offset < len(ranked):
+        if key is None:
+            key = result_cache.store(ranked)
+        response.headers["X-Next-Cursor"] = result_cache.encode_cursor(key, next_offset, page_size)
+    return hydrate_matches(ranked[offset:next_offset])
+
+
+def validate_resume_file(resume_file: UploadFile):
+    if not resume_file.filename:
+        raise HTTPException(status_code=400, detail="No file selected")
+    
+    file_extension = resume_file.filename.lower().split('.')[-1]
+    if file_extension not in ['pdf', 'docx', 'doc']:
+        raise HTTPException(
+            status_code=400, 
+            detail="Unsupported file type. Please upload PDF or DOCX files."
+        )
+
+
+def rank_text(query_text: str, metadata_filter: Optional[Dict[str, Any]]) -> List[Tuple[str, float]]:
+    """
+    Embed query text with the live index version's model, rank labs against it
+    and sample the search for shadow comparison
+    """
+    version = index_manager.live()
+    start = time.monotonic()
+    # Selected suggestions are pre-embedded, so only free-form text hits the embedding API
+    query_vector = suggest_service.get_embedding(query_text, version["model_name"])
+    if query_vector is None:
+        query_vector = index_manager.vector_service_for(version["model_name"]).vectorize_text(query_text)
+    embed_seconds = time.monotonic() - start
+
+    start = time.monotonic()
+    ranked = index_manager.rank(version, query_vector, RANKED_LIST_SIZE, metadata_filter)
+    index_manager.submit_shadow(
+        query_text, query_vector, metadata_filter, ranked, embed_seconds, time.monotonic() - start
+    )
+    return ranked
+
+
+def filter_key(metadata_filter: Optional[Dict[str, Any]]) -> str:
+    return json.dumps(metadata_filter, sort_keys=True)
+
+
+async def shared_call(key: Tuple, fn, *args) -> Any:
+    """Run a blocking search step off the event loop, shared by identical concurrent searches"""
+    try:
+        return await search_flight.do(key, lambda: run_in_threadpool(fn, *args))
+    except SingleFlightTimeout:
+        raise HTTPException(status_code=504, detail="Search timed out. Please try again.")
+
+
+async def rank_query_text(query_text: str, metadata_filter: Optional[Dict[str, Any]]) -> List[Tuple[str, float]]:
+    normalized = " ".join(query_text.lower().split())
+    key = ("text", index_manager.live()["name"], normalized, filter_key(metadata_filter))
+    return await shared_call(key, rank_text, query_text, metadata_filter)
+
+
+def resume_file_key(file_content: bytes, filename: str) -> Tuple[str, str]:
+    return hashlib.sha256(file_content).hexdigest(), filename.lower().split('.')[-1]
+
+
+async def extract_resume_text(file_content: bytes, filename: str) -> str:
+    """Extract text from a resume, shared by identical uploads"""
+    key = ("resume-text", *resume_file_key(file_content, filename))
+    return await shared_call(key, vector_service.extract_text_from_resume, file_content, filename)
+
+
+async def extract_resume_interests(file_content: bytes, filename: str, resume_text: str) -> str:
+    """Extract the research interest text used to query from a resume's text, shared by identical uploads"""
+    key = ("resume-interests", *resume_file_key(file_content, filename))
+    query_text = await shared_call(key, vector_service.extract_research_interests_from_resume, resume_text)
+    if not query_text.strip():
+        raise HTTPException(
+            status_code=400, 
+            detail="Could not extract research interests from resume. Please try with text input."
+        )
+    return query_text
+
+
+async def rank_resume_query(
+    file_content: bytes, filename: str, query_text: str, metadata_filter: Optional[Dict[str, Any]]
+) -> List[Tuple[str, float]]:
+    """Rank labs for the research interests extracted from a resume, shared by identical uploads"""
+    file_hash, file_extension = resume_file_key(file_content, filename)
+    key = ("resume", index_manager.live()["name"], file_hash, file_extension, filter_key(metadata_filter))
+    return await shared_call(key, rank_text, query_text, metadata_filter)
+
+
+async def rank_resume(
+    file_content: bytes, filename: str, metadata_filter: Optional[Dict[str, Any]]
+) -> List[Tuple[str, float]]:
+    resume_text = await extract_resume_text(file_content, filename)
+    query_text = await extract_resume_interests(file_content, filename, resume_text)
+    return await rank_resume_query(file_content, filename, query_text, metadata_filter)
 
 # Mount static files for frontend
 import os
@@ -47,6 +260,69 @@ if os.path.exists(frontend_path):
 app.mount("/static", StaticFiles(directory=frontend_path), name="static")
 
 
+async def rebuild_suggestions():
+    """Build suggestions at startup and refresh them with popular queries"""
+    while True:
+        try:
+            await run_in_threadpool(suggest_service.build)
+        except Exception as e:
+            print(f"Failed to build suggestions: {e}")
+        await asyncio.sleep(SUGGEST_REBUILD_SECONDS)
+
+
+def backfill_catalogue():
+    """Add labs the live index version serves but the catalogue files miss, so filters can match them"""
+    namespace = index_manager.live()["namespace"]
+    lab_ids = pinecone_service.list_lab_ids(namespace)
+    if lab_ids is None:
+        print("Cannot list labs in the live index; catalogue backfill skipped")
+        return
+
+    missing = [lab_id for lab_id in lab_ids if catalog_service.get_lab(lab_id) is None]
+    for start in range(0, len(missing), BACKFILL_FETCH_SIZE):
+        records = pinecone_service.fetch_metadata(missing[start:start + BACKFILL_FETCH_SIZE], namespace)
+        catalog_service.backfill([{**metadata, "id": lab_id} for lab_id, metadata in records.items()])
+
+
+def backfill_neighbor_graph():
+    """Add labs the live index version serves but its neighbour graph lacks, from their stored vectors"""
+    live = index_manager.live()
+    lab_ids = pinecone_service.list_lab_ids(live["namespace"])
+    if lab_ids is None:
+        print("Cannot list labs in the live index; neighbour graph backfill skipped")
+        return
+
+    neighbor_graph = index_manager.graph_for(live)
+    neighbor_graph.reload_if_changed()
+    missing = [lab_id for lab_id in lab_ids if lab_id not in neighbor_graph]
+    if not missing:
+        return
+
+    vectors = {}
+    for start in range(0, len(missing), BACKFILL_FETCH_SIZE):
+        vectors.update(pinecone_service.fetch_vectors(missing[start:start + BACKFILL_FETCH_SIZE], live["namespace"]))
+    index_manager.update_graphs({live["name"]: vectors})
+    print(f"Backfilled {len(vectors)} labs into the neighbour graph")
+
+
+async def backfill_from_live_index():
+    """Fill the catalogue and neighbour graph from the live index on deployments that predate them"""
+    try:
+        await run_in_threadpool(backfill_catalogue)
+    except Exception as e:
+        print(f"Failed to backfill catalogue: {e}")
+    try:
+        await run_in_threadpool(backfill_neighbor_graph)
+    except Exception as e:
+        print(f"Failed to backfill neighbour graph: {e}")
+
+
+@app.on_event("startup")
+async def start_background_tasks():
+    app.state.backfill_task = asyncio.create_task(backfill_from_live_index())
+    app.state.suggest_task = asyncio.create_task(rebuild_suggestions())
+
+
 @app.get("/", response_class=HTMLResponse)
 async def root():
     frontend_index = os.path.join(frontend_path, "index.html")
@@ -55,77 +331,68 @@ async def root():
 
 
 @app.post("/api/search-labs", response_model=List[LabMatch])
-async def search_labs(query: UserQuery):
+async def search_labs(query: UserQuery, request: Request, response: Response):
+    """
+    Search labs by keywords. When more results are available the
+    X-Next-Cursor response header can be passed to /api/search-labs/next.
+    """
     try:
-        # Vectorize user query
-        query_vector = vector_service.vectorize_text(query.keywords)
+        # Resolve filters locally so a filter matching no labs costs nothing
+        metadata_filter = await run_in_threadpool(catalog_service.build_pinecone_filter, query.filters)
+        if metadata_filter == MATCH_NOTHING_FILTER:
+            return []
 
-        # Search similar labs in Pinecone
-        matches = pinecone_service.search_similar_labs(
-            query_vector=query_vector, top_k=query.max_results
-        )
+        ranked = await rank_query_text(query.keywords, metadata_filter)
+        suggest_service.record_query(query.keywords, request.client.host if request.client else "", len(ranked))
 
-        return matches
+        return await run_in_threadpool(paginate, ranked, query.max_results, response)
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
 
 @app.post("/api/search-labs-with-resume", response_model=List[LabMatch])
 async def search_labs_with_resume(
-    max_results: int = Form(10),
+    response: Response,
+    max_results: int = Form(10, ge=1, le=MAX_PAGE_SIZE),
     search_type: str = Form("text"),
     keywords: Optional[str] = Form(None),
-    resume_file: Optional[UploadFile] = File(None)
+    resume_file: Optional[UploadFile] = File(None),
+    research_areas: Optional[str] = Form(None),
+    professors: Optional[str] = Form(None),
+    exclude_professors: Optional[str] = Form(None)
 ):
     """
-    Search labs with either text keywords or resume file
+    Search labs with either text keywords or resume file.
+    Filter fields are comma-separated lists.
     """
     try:
-        query_text = ""
+        filters = SearchFilters(
+            research_areas=parse_form_list(research_areas),
+            professors=parse_form_list(professors),
+            exclude_professors=parse_form_list(exclude_professors)
+        )
+        metadata_filter = await run_in_threadpool(catalog_service.build_pinecone_filter, filters)
+        if metadata_filter == MATCH_NOTHING_FILTER:
+            return []
         
         if search_type == "resume" and resume_file:
-            # Validate file type
-            if not resume_file.filename:
-                raise HTTPException(status_code=400, detail="No file selected")
-            
-            file_extension = resume_file.filename.lower().split('.')[-1]
-            if file_extension not in ['pdf', 'docx', 'doc']:
-                raise HTTPException(
-                    status_code=400, 
-                    detail="Unsupported file type. Please upload PDF or DOCX files."
-                )
+            validate_resume_file(resume_file)
             
             # Read file content
             file_content = await resume_file.read()
             
-            # Extract text from resume
-            resume_text = vector_service.extract_text_from_resume(file_content, resume_file.filename)
-            
-            # Extract research interests from resume
-            query_text = vector_service.extract_research_interests_from_resume(resume_text)
-            
-            if not query_text.strip():
-                raise HTTPException(
-                    status_code=400, 
-                    detail="Could not extract research interests from resume. Please try with text input."
-                )
+            ranked = await rank_resume(file_content, resume_file.filename, metadata_filter)
         
         elif search_type == "text" and keywords:
-            query_text = keywords
+            ranked = await rank_query_text(keywords, metadata_filter)
         
         else:
             raise HTTPException(status_code=400, detail="Please provide either keywords or upload a resume")
         
-        # Vectorize the query text
-        query_vector = vector_service.vectorize_text(query_text)
-        
-        # Search similar labs in Pinecone
-        matches = pinecone_service.search_similar_labs(
-            query_vector=query_vector, top_k=max_results
-        )
-        
-        return matches
+        return await run_in_threadpool(paginate, ranked, max_results, response)
         
     except HTTPException:
         raise
@@ -133,34 +400,281 @@ async def search_labs_with_resume(
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
 
-@app.post("/api/add-lab")
-async def add_lab(lab_data: Dict[str, Any]):
+def ndjson_event(event: str, **fields) -> str:
+    return json.dumps({"event": event, **fields}) + "\n"
+
+
+@app.post("/api/search-labs-with-resume/stream")
+async def stream_search_labs_with_resume(
+    request: Request,
+    resume_file: UploadFile = File(...),
+    max_results: int = Form(10, ge=1, le=MAX_PAGE_SIZE),
+    research_areas: Optional[str] = Form(None),
+    professors: Optional[str] = Form(None),
+    exclude_professors: Optional[str] = Form(None)
+):
     """
-    Add a new lab to the vector database (admin endpoint)
+    Streaming variant of the resume search, returning NDJSON events:
+    "stage" for each pipeline step, "interests" with the extracted query text,
+    "result" per hydrated lab match, then "done" with the next page cursor,
+    or "error" if a step fails. Work stops as soon as the client disconnects.
+    """
+    validate_resume_file(resume_file)
+    file_content = await resume_file.read()
+    filename = resume_file.filename
+
+    filters = SearchFilters(
+        research_areas=parse_form_list(research_areas),
+        professors=parse_form_list(professors),
+        exclude_professors=parse_form_list(exclude_professors)
+    )
+
+    async def events():
+        try:
+            yield ndjson_event("stage", stage="upload")
+            metadata_filter = await run_in_threadpool(catalog_service.build_pinecone_filter, filters)
+            if metadata_filter == MATCH_NOTHING_FILTER:
+                yield ndjson_event("done", count=0, next_cursor=None)
+                return
+
+            yield ndjson_event("stage", stage="parse")
+            resume_text = await extract_resume_text(file_content, filename)
+            if await request.is_disconnected():
+                return
+
+            yield ndjson_event("stage", stage="extract")
+            query_text = await extract_resume_interests(file_content, filename, resume_text)
+            yield ndjson_event("interests", text=query_text)
+            if await request.is_disconnected():
+                return
+
+            # Embedding and ranking run as one shared step, so they are reported as one stage
+            yield ndjson_event("stage", stage="search")
+            ranked = await rank_resume_query(file_content, filename, query_text, metadata_filter)
+
+            page = ranked[:max_results]
+            count = 0
+            for start in range(0, len(page), STREAM_HYDRATE_CHUNK):
+                if await request.is_disconnected():
+                    return
+                matches = await run_in_threadpool(hydrate_matches, page[start:start + STREAM_HYDRATE_CHUNK])
+                for match in matches:
+                    count += 1
+                    yield ndjson_event("result", match=match.model_dump())
+
+            next_cursor = None
+            if max_results < len(ranked):
+                next_cursor = result_cache.encode_cursor(result_cache.store(ranked), max_results, max_results)
+            yield ndjson_event("done", count=count, next_cursor=next_cursor)
+
+        except HTTPException as e:
+            yield ndjson_event("error", detail=e.detail)
+        except Exception as e:
+            yield ndjson_event("error", detail=f"Search failed: {str(e)}")
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+@app.get("/api/search-labs/next", response_model=List[LabMatch])
+async def search_labs_next(cursor: str, response: Response):
+    """
+    Return the next page of a previous search from its cached ranked list
     """
     try:
-        # Vectorize lab description
-        description = f"{lab_data.get('name', '')} {lab_data.get('description', '')} {lab_data.get('research_areas', '')}"
-        lab_vector = vector_service.vectorize_text(description)
+        key, offset, page_size = result_cache.decode_cursor(cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    ranked = result_cache.get(key)
+    if ranked is None:
+        raise HTTPException(status_code=410, detail="Search results expired. Please search again.")
 
-        # Store in Pinecone
-        success = pinecone_service.upsert_lab(
-            lab_id=lab_data.get("id"), vector=lab_vector, metadata=lab_data
+    try:
+        return await run_in_threadpool(
+            paginate, ranked, min(page_size, MAX_PAGE_SIZE), response, key=key, offset=offset
         )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
-        if success:
-            return {"message": "Lab added successfully"}
-        else:
-            raise HTTPException(status_code=500, detail="Failed to add lab")
+
+@app.get("/api/suggest", response_model=List[str])
+async def suggest(q: str, limit: int = 8):
+    """
+    Autocomplete research interests from the catalogue and popular queries
+    """
+    return suggest_service.suggest(q, limit=max(1, min(limit, 20)))
+
+
+def live_neighbors(lab_id: str, limit: int) -> Optional[List[Tuple[str, float]]]:
+    """Look up a lab's neighbours in the live index version's graph, reloading it if rewritten"""
+    neighbor_graph = index_manager.graph_for(index_manager.live())
+    neighbor_graph.reload_if_changed()
+    return neighbor_graph.neighbors(lab_id, limit=limit)
+
+
+@app.get("/api/labs/{lab_id}/similar", response_model=List[LabMatch])
+async def similar_labs(lab_id: str, limit: int = 10):
+    """
+    Return labs similar to the given lab from the precomputed neighbour graph
+    """
+    neighbors = await run_in_threadpool(live_neighbors, lab_id, max(1, min(limit, MAX_PAGE_SIZE)))
+    if neighbors is None:
+        raise HTTPException(status_code=404, detail=f"Lab {lab_id} not found")
+
+    try:
+        return await run_in_threadpool(hydrate_matches, neighbors)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to load similar labs: {str(e)}")
+
+
+@app.post("/api/add-lab")
+async def add_lab(lab: LabInfo):
+    """
+    Add a new lab to the vector database (admin endpoint)
+    """
+    error = lab_id_error(lab)
+    if error:
+        raise HTTPException(status_code=422, detail=error)
+
+    try:
+        # Vectorize and store in every index version receiving writes, off the event loop
+        vectors_by_version = await run_in_threadpool(index_manager.upsert_labs, [lab])
+        await run_in_threadpool(on_labs_ingested, [lab], vectors_by_version)
+        return {"message": "Lab added successfully"}
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to add lab: {str(e)}")
 
 
+@app.post("/api/labs/bulk", response_model=IngestJobStatus, status_code=202)
+async def bulk_add_labs(request: Request):
+    """
+    Queue a bulk import of labs from a JSONL body, one LabInfo record per line.
+    Invalid lines are reported in the job status instead of failing the import.
+    """
+    labs: List[Tuple[int, LabInfo]] = []
+    errors: List[IngestRecordError] = []
+    seen_ids = set()
+    line_number = 0
+    buffer = b""
+
+    def handle_line(raw: bytes):
+        nonlocal line_number
+        line_number += 1
+        if len(raw) > MAX_BULK_LINE_BYTES:
+            raise HTTPException(status_code=413, detail=f"Line {line_number} exceeds {MAX_BULK_LINE_BYTES} bytes")
+        line = raw.decode("utf-8", errors="replace").strip()
+        if not line:
+            return
+        lab, error = parse_lab_line(line, line_number, seen_ids)
+        if error:
+            errors.append(error)
+        else:
+            labs.append((line_number, lab))
+        if len(labs) + len(errors) > MAX_BULK_RECORDS:
+            raise HTTPException(status_code=413, detail=f"Bulk imports are limited to {MAX_BULK_RECORDS} labs")
+
+    # Validate records as the body streams in rather than buffering it whole
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for raw in lines:
+            handle_line(raw)
+        # Bound memory for a body with no newlines or one oversized record
+        if len(buffer) > MAX_BULK_LINE_BYTES:
+            raise HTTPException(
+                status_code=413, detail=f"Line {line_number + 1} exceeds {MAX_BULK_LINE_BYTES} bytes"
+            )
+    if buffer:
+        handle_line(buffer)
+
+    if not labs and not errors:
+        raise HTTPException(status_code=400, detail="No lab records provided")
+
+    return ingest_jobs.submit(labs, errors, total=len(labs) + len(errors))
+
+
+@app.get("/api/labs/bulk/{job_id}", response_model=IngestJobStatus)
+async def bulk_add_labs_status(job_id: str):
+    """Report progress and per-record errors of a bulk import"""
+    job = ingest_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Ingest job {job_id} not found")
+    return job
+
+
+def apply_live_version():
+    """Point live-version-specific state at the index version now serving searches"""
+    live = index_manager.live()
+    suggest_service.reset(index_manager.vector_service_for(live["model_name"]))
+    app.state.suggest_rebuild = asyncio.create_task(run_in_threadpool(suggest_service.build))
+
+
+@app.get("/api/admin/index-versions")
+async def list_index_versions():
+    """
+    Report index versions, build progress and shadow comparison against live
+    """
+    return index_manager.status()
+
+
+@app.post("/api/admin/index-versions", status_code=202)
+async def build_index_version(build: IndexBuildRequest):
+    """
+    Start filling a new index version for a (model, embed text recipe) pair
+    """
+    try:
+        return index_manager.start_build(build.model_name, build.recipe, build.labs_per_second)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/api/admin/index-versions/rollback")
+async def rollback_index_version():
+    """
+    Switch searches back to the index version replaced by the last cutover
+    """
+    try:
+        live = index_manager.rollback()
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    apply_live_version()
+    return live
+
+
+@app.post("/api/admin/index-versions/{name}/cutover")
+async def cutover_index_version(name: str):
+    """
+    Atomically switch searches to a ready index version
+    """
+    try:
+        live = await run_in_threadpool(index_manager.cutover, name)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Index version {name} not found")
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    apply_live_version()
+    return live
+
+
+@app.post("/api/admin/index-versions/{name}/retire")
+async def retire_index_version(name: str):
+    """
+    Stop writing to an index version that is no longer needed
+    """
+    try:
+        index_manager.retire(name)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Index version {name} not found")
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"message": f"Index version {name} retired"}
+
+
 @app.get("/api/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy"}
+    return {"status": "healthy", "admission": admission.stats()}
 
 
 if __name__ == "__main__":
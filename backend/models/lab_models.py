@@ -1,10 +1,20 @@
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 
+class SearchFilters(BaseModel):
+    """Model for structured search filters"""
+    research_areas: List[str] = Field(default_factory=list, description="Only return labs in any of these research areas")
+    professors: List[str] = Field(default_factory=list, description="Only return labs led by any of these professors")
+    exclude_professors: List[str] = Field(default_factory=list, description="Never return labs led by these professors")
+
+    def is_empty(self) -> bool:
+        return not (self.research_areas or self.professors or self.exclude_professors)
+
 class UserQuery(BaseModel):
     """Model for user search queries"""
     keywords: str = Field(..., description="User's research interests and keywords")
     max_results: int = Field(default=10, ge=1, le=50, description="Maximum number of results to return")
+    filters: Optional[SearchFilters] = Field(None, description="Structured filters applied before ranking")
 
 class UserQueryWithFile(BaseModel):
     """Model for user search queries with optional file upload"""
@@ -22,6 +32,26 @@ class LabInfo(BaseModel):
     website: Optional[str] = None
     email: Optional[str] = None
 
+    @classmethod
+    def from_metadata(cls, metadata: Dict[str, Any]) -> "LabInfo":
+        """Build lab info from Pinecone metadata or a scraped lab record"""
+        # Parse research_areas from string to list if needed
+        research_areas = metadata.get('research_areas', '')
+        if isinstance(research_areas, str):
+            research_areas = [area.strip() for area in research_areas.split(',') if area.strip()]
+        elif not isinstance(research_areas, list):
+            research_areas = []
+
+        return cls(
+            id=metadata.get('id', ''),
+            name=metadata.get('name', ''),
+            professor=metadata.get('professor', ''),
+            description=metadata.get('description', ''),
+            research_areas=research_areas,
+            website=metadata.get('website') or metadata.get('url', ''),
+            email=metadata.get('email', '')
+        )
+
 class LabMatch(BaseModel):
     """Model for lab search results with similarity scores"""
     lab: LabInfo
@@ -31,4 +61,28 @@ class PineconeMatch(BaseModel):
     """Model for raw Pinecone search results"""
     id: str
     score: float
-    metadata: Dict[str, Any] 
\ No newline at end of file
+    metadata: Dict[str, Any] 
+
+class IngestRecordError(BaseModel):
+    """Model for a lab record rejected during bulk ingestion"""
+    line: int = Field(..., description="1-based line number in the submitted JSONL body")
+    lab_id: Optional[str] = None
+    error: str
+
+class IngestJobStatus(BaseModel):
+    """Model for the progress of a bulk lab ingestion job"""
+    job_id: str
+    status: str = Field(..., description="One of 'queued', 'running', 'completed' or 'failed'")
+    total: int = Field(..., description="Number of lines received")
+    processed: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    errors: List[IngestRecordError] = Field(default_factory=list)
+    created_at: str
+    finished_at: Optional[str] = None
+
+class IndexBuildRequest(BaseModel):
+    """Model for starting a new embedding index version"""
+    model_name: str = Field(default="sentence-transformers/all-MiniLM-L6-v2", description="Embedding model to build with")
+    recipe: str = Field(default="v1", description="Embed text recipe to build with")
+    labs_per_second: float = Field(default=2.0, gt=0, description="Throttle for the background build")
@@ -0,0 +1,139 @@
+import asyncio
+import json
+import logging
+import math
+import re
+import time
+from typing import Dict, List, Optional, Pattern, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionPool:
+    """
+    Bounded concurrency pool with a queue-time budget.
+
+    Requests beyond max_concurrency wait in line, but a request whose
+    estimated wait exceeds max_queue_seconds is rejected immediately, and one
+    still waiting when the budget runs out is rejected then.
+    """
+
+    def __init__(self, name: str, max_concurrency: int, max_queue_seconds: float, initial_service_seconds: float = 1.0):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue_seconds = max_queue_seconds
+        self.active = 0
+        self.waiting = 0
+        self.shed = 0
+        # Exponentially weighted moving average of request service time
+        self.avg_service_seconds = initial_service_seconds
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    def estimated_wait(self) -> float:
+        """Expected queue time for a request arriving now"""
+        queued_ahead = self.active + self.waiting - self.max_concurrency + 1
+        if queued_ahead <= 0:
+            return 0.0
+        return queued_ahead * self.avg_service_seconds / self.max_concurrency
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(max(self.estimated_wait(), self.avg_service_seconds)))
+
+    async def acquire(self) -> bool:
+        """Wait for a slot within the queue budget; False means the request is shed"""
+        if self.estimated_wait() > self.max_queue_seconds:
+            self.shed += 1
+            return False
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.max_queue_seconds)
+        except asyncio.TimeoutError:
+            self.shed += 1
+            return False
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        return True
+
+    def release(self, service_seconds: float):
+        self.active -= 1
+        self._semaphore.release()
+        self.avg_service_seconds = 0.8 * self.avg_service_seconds + 0.2 * service_seconds
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "shed": self.shed,
+            "max_concurrency": self.max_concurrency,
+            "avg_service_seconds": round(self.avg_service_seconds, 3),
+        }
+
+
+class AdmissionController:
+    """Maps requests to admission pools by method and path"""
+
+    def __init__(self, pools: List[AdmissionPool]):
+        self.pools = {pool.name: pool for pool in pools}
+        self._routes: List[Tuple[str, Pattern[str], AdmissionPool]] = []
+
+    def route(self, method: str, path_pattern: str, pool_name: str):
+        """Admit requests matching method and a full-path regex through a pool"""
+        self._routes.append((method.upper(), re.compile(path_pattern), self.pools[pool_name]))
+
+    def classify(self, method: str, path: str) -> Optional[AdmissionPool]:
+        for route_method, pattern, pool in self._routes:
+            if route_method == method and pattern.fullmatch(path):
+                return pool
+        return None
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {name: pool.stats() for name, pool in self.pools.items()}
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware that holds an admission slot for the whole request,
+    including streamed response bodies, and sheds with 503 and Retry-After.
+    Unrouted paths such as the landing page bypass admission entirely.
+    """
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        pool = self.controller.classify(scope["method"], scope["path"])
+        if pool is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not await pool.acquire():
+            logger.warning(f"Shed {scope['method']} {scope['path']} from {pool.name} pool")
+            await self._reject(send, pool)
+            return
+
+        start = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            pool.release(time.monotonic() - start)
+
+    async def _reject(self, send, pool: AdmissionPool):
+        body = json.dumps({"detail": "Server is busy. Please try again shortly."}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("ascii")),
+                (b"retry-after", str(pool.retry_after()).encode("ascii")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,265 @@
+import json
+import os
+import logging
+import tempfile
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+
+from models.lab_models import LabInfo, SearchFilters
+
+logger = logging.getLogger(__name__)
+
+# Pinecone filter for a filtered search that cannot match any lab
+MATCH_NOTHING_FILTER = {"id": {"$in": []}}
+
+
+def normalize_term(term: str) -> str:
+    """Normalize a research area or professor name for exact-match filtering"""
+    return " ".join(term.lower().split())
+
+
+def split_professors(professor: str) -> List[str]:
+    """Split a merged professor field ("A, B") into individual names"""
+    return [name.strip() for name in professor.split(",") if name.strip()]
+
+
+class CatalogService:
+    """
+    In-memory catalogue of labs with bitmap indexes over research areas and professors.
+
+    Each lab gets a bit position; every normalized research area and professor maps to
+    an int bitmap of the labs carrying it, so structured filters resolve with a few
+    bitwise operations and are pushed down to Pinecone as an id filter.
+
+    The catalogue is the scraped JSON file plus labs ingested through the API, which
+    are persisted to their own file so they survive restarts and scraper reruns.
+    Both files are reloaded when another process rewrites them.
+    """
+
+    def __init__(self, data_path: Optional[str] = None, ingested_path: Optional[str] = None):
+        self.data_path = data_path or os.getenv("LABS_DATA_PATH", "data/labs_data.json")
+        self.ingested_path = ingested_path or os.getenv("INGESTED_LABS_PATH", "data/ingested_labs.json")
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._labs: Dict[str, LabInfo] = {}
+        # Raw records keep fields LabInfo drops, such as scraped page content
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self._ingested: Dict[str, Dict[str, Any]] = {}
+        # Labs found only in the live index, kept in memory beneath the catalogue files
+        self._backfilled: Dict[str, Tuple[LabInfo, Dict[str, Any]]] = {}
+        self._positions: Dict[str, int] = {}
+        self._ids: List[str] = []
+        self._area_bitmaps: Dict[str, int] = {}
+        self._professor_bitmaps: Dict[str, int] = {}
+        self._loaded_mtimes: Optional[Tuple[Optional[float], Optional[float]]] = None
+        self.load()
+
+    def _file_mtimes(self) -> Tuple[Optional[float], Optional[float]]:
+        mtimes = []
+        for path in (self.data_path, self.ingested_path):
+            try:
+                mtimes.append(os.path.getmtime(path))
+            except OSError:
+                mtimes.append(None)
+        return tuple(mtimes)
+
+    def _read_labs(self, path: str) -> List[Tuple[LabInfo, Dict[str, Any]]]:
+        if not os.path.exists(path):
+            return []
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                records = json.load(f)
+        except Exception as e:
+            logger.error(f"Failed to load lab catalogue {path}: {e}")
+            return []
+
+        labs = []
+        for record in records:
+            try:
+                labs.append((LabInfo.from_metadata(record), record))
+            except Exception as e:
+                logger.warning(f"Skipping invalid catalogue record {record.get('id')}: {e}")
+        return labs
+
+    def load(self) -> int:
+        """Load the scraped lab catalogue and persisted ingested labs, replacing the current one"""
+        mtimes = self._file_mtimes()
+        if mtimes[0] is None:
+            logger.warning(f"Lab catalogue not found: {self.data_path}")
+
+        scraped = self._read_labs(self.data_path)
+        ingested = self._read_labs(self.ingested_path)
+
+        with self._lock:
+            self._labs = {}
+            self._records = {}
+            self._positions = {}
+            self._ids = []
+            self._area_bitmaps = {}
+            self._professor_bitmaps = {}
+            # Ingested labs come last so they replace scraped records with the same id
+            for lab, record in list(self._backfilled.values()) + scraped + ingested:
+                self._index_lab(lab, record)
+            self._ingested = {lab.id: record for lab, record in ingested}
+            self._loaded_mtimes = mtimes
+
+        logger.info(f"Loaded {len(self._labs)} labs into catalogue ({len(ingested)} ingested)")
+        return len(self._labs)
+
+    def reload_if_changed(self):
+        """Pick up a catalogue rewritten by the scraper or another API process"""
+        if self._file_mtimes() != self._loaded_mtimes:
+            self.load()
+
+    def backfill(self, records: List[Dict[str, Any]]) -> int:
+        """
+        Add labs the index serves but the catalogue files are missing, such as
+        labs added before ingested labs were persisted. They are kept in memory
+        only, so the catalogue files always take precedence.
+        """
+        added = 0
+        with self._lock:
+            for record in records:
+                try:
+                    lab = LabInfo.from_metadata(record)
+                except Exception as e:
+                    logger.warning(f"Skipping invalid index record {record.get('id')}: {e}")
+                    continue
+                if not lab.id or lab.id in self._labs:
+                    continue
+                self._backfilled[lab.id] = (lab, record)
+                self._index_lab(lab, record)
+                added += 1
+
+        if added:
+            logger.info(f"Backfilled {added} labs into catalogue from the index")
+        return added
+
+    def add_labs(self, labs: List[LabInfo]):
+        """Add or replace ingested labs and persist them"""
+        with self._write_lock:
+            with self._lock:
+                for lab in labs:
+                    record = lab.model_dump()
+                    self._index_lab(lab, record)
+                    self._ingested[lab.id] = record
+                records = list(self._ingested.values())
+            self._save_ingested(records)
+
+    def _save_ingested(self, records: List[Dict[str, Any]]):
+        """Atomically write ingested labs to disk"""
+        directory = os.path.dirname(self.ingested_path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(records, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.ingested_path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+        self._loaded_mtimes = (self._loaded_mtimes[0], os.path.getmtime(self.ingested_path))
+
+    def _index_lab(self, lab: LabInfo, record: Dict[str, Any]):
+        """Add or replace a lab and update its bitmap entries; caller holds the lock"""
+        position = self._positions.get(lab.id)
+        if position is None:
+            position = len(self._ids)
+            self._positions[lab.id] = position
+            self._ids.append(lab.id)
+        else:
+            # Clear the old bit everywhere before re-indexing the updated lab
+            mask = ~(1 << position)
+            for bitmaps in (self._area_bitmaps, self._professor_bitmaps):
+                for key in bitmaps:
+                    bitmaps[key] &= mask
+
+        bit = 1 << position
+        for area in lab.research_areas:
+            key = normalize_term(area)
+            self._area_bitmaps[key] = self._area_bitmaps.get(key, 0) | bit
+        for professor in split_professors(lab.professor):
+            key = normalize_term(professor)
+            self._professor_bitmaps[key] = self._professor_bitmaps.get(key, 0) | bit
+
+        self._labs[lab.id] = lab
+        self._records[lab.id] = record
+
+    def get_lab(self, lab_id: str) -> Optional[LabInfo]:
+        return self._labs.get(lab_id)
+
+    def get_record(self, lab_id: str) -> Optional[Dict[str, Any]]:
+        """Return the lab as scraped or ingested, including fields LabInfo does not keep"""
+        return self._records.get(lab_id)
+
+    def get_labs(self) -> List[LabInfo]:
+        self.reload_if_changed()
+        return list(self._labs.values())
+
+    def __len__(self) -> int:
+        return len(self._labs)
+
+    def _union(self, bitmaps: Dict[str, int], terms: List[str]) -> int:
+        result = 0
+        for term in terms:
+            result |= bitmaps.get(normalize_term(term), 0)
+        return result
+
+    def _ids_in(self, mask: int) -> List[str]:
+        return [lab_id for position, lab_id in enumerate(self._ids) if mask >> position & 1]
+
+    def resolve_filter(self, filters: SearchFilters) -> Optional[List[str]]:
+        """
+        Resolve include filters to the list of matching lab ids, minus excluded labs.
+
+        Returns None when there are no include filters.
+        """
+        if not filters.research_areas and not filters.professors:
+            return None
+
+        with self._lock:
+            mask = (1 << len(self._ids)) - 1
+            if filters.research_areas:
+                mask &= self._union(self._area_bitmaps, filters.research_areas)
+            if filters.professors:
+                mask &= self._union(self._professor_bitmaps, filters.professors)
+            if filters.exclude_professors:
+                mask &= ~self._union(self._professor_bitmaps, filters.exclude_professors)
+            return self._ids_in(mask)
+
+    def resolve_excluded(self, filters: SearchFilters) -> List[str]:
+        """Resolve exclude filters to the list of lab ids to leave out"""
+        with self._lock:
+            return self._ids_in(self._union(self._professor_bitmaps, filters.exclude_professors))
+
+    def build_pinecone_filter(self, filters: Optional[SearchFilters]) -> Optional[Dict[str, Any]]:
+        """
+        Translate search filters into a Pinecone metadata filter.
+
+        Returns None for no filtering and MATCH_NOTHING_FILTER when nothing can match.
+        Exclude-only filters push down the excluded ids, so labs missing from the
+        catalogue are still searched.
+        """
+        if not filters or filters.is_empty():
+            return None
+
+        self.reload_if_changed()
+        if not self._labs:
+            # No local catalogue: fall back to filtering on raw metadata values
+            conditions = []
+            if filters.research_areas:
+                conditions.append({"research_areas": {"$in": filters.research_areas}})
+            if filters.professors:
+                conditions.append({"professor": {"$in": filters.professors}})
+            if filters.exclude_professors:
+                conditions.append({"professor": {"$nin": filters.exclude_professors}})
+            return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+        lab_ids = self.resolve_filter(filters)
+        if lab_ids is None:
+            excluded = self.resolve_excluded(filters)
+            return {"id": {"$nin": excluded}} if excluded else None
+        if not lab_ids:
+            return MATCH_NOTHING_FILTER
+        return {"id": {"$in": lab_ids}}
@@ -0,0 +1,43 @@
+from typing import Any, Callable, Dict
+
+# Embed-text recipes turn a lab record (scraped JSON, Pinecone metadata or a
+# dumped LabInfo) into the text that gets embedded. Index versions are keyed
+# by (model, recipe), so a recipe must never change once vectors exist for it;
+# add a new one instead.
+
+
+def _research_areas(lab: Dict[str, Any]) -> str:
+    areas = lab.get("research_areas") or []
+    if isinstance(areas, str):
+        return areas
+    return ", ".join(areas)
+
+
+def _recipe_v1(lab: Dict[str, Any]) -> str:
+    """Lab name with its AI description, or the start of the page content without one"""
+    description = lab.get("description", "")
+    if not description or description == lab.get("name", ""):
+        return f"{lab.get('name', '')} {(lab.get('content') or '')[:500]}"
+    return f"{lab.get('name', '')} {description}"
+
+
+def _recipe_v2(lab: Dict[str, Any]) -> str:
+    """Lab name, research areas and professors ahead of the description"""
+    return (
+        f"{lab.get('name', '')}. Research areas: {_research_areas(lab)}. "
+        f"Professor: {lab.get('professor', '')}. {lab.get('description', '')}"
+    )
+
+
+EMBED_TEXT_RECIPES: Dict[str, Callable[[Dict[str, Any]], str]] = {
+    "v1": _recipe_v1,
+    "v2": _recipe_v2,
+}
+
+DEFAULT_RECIPE = "v1"
+
+
+def build_embed_text(lab: Dict[str, Any], recipe: str = DEFAULT_RECIPE) -> str:
+    if recipe not in EMBED_TEXT_RECIPES:
+        raise ValueError(f"Unknown embed text recipe: {recipe}")
+    return EMBED_TEXT_RECIPES[recipe](lab).strip()
@@ -0,0 +1,168 @@
+import json
+import os
+import re
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_NAME = "collegelabmatch"
+DEFAULT_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+LEGACY_VERSION = "legacy"
+
+# Versions that receive writes from ingestion alongside the live one
+WRITE_STATUSES = ("live", "building", "ready")
+
+
+def index_name() -> str:
+    return os.getenv("PINECONE_INDEX_NAME", DEFAULT_INDEX_NAME)
+
+
+def model_slug(model_name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", model_name.split("/")[-1].lower()).strip("-")
+
+
+class IndexRegistry:
+    """
+    File-backed registry of embedding index versions.
+
+    Each version is a Pinecone namespace filled with one (model, embed-text
+    recipe) pair. The registry records which version serves searches and which
+    one it replaced, so cutover and rollback are a single atomic file write.
+    It only depends on the standard library so the scraping pipeline can read
+    it too. The pre-versioning default namespace is registered as "legacy".
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv("INDEX_REGISTRY_PATH", "data/index_versions.json")
+        self._lock = threading.RLock()
+        self._data: Dict[str, Any] = {}
+        self.load()
+
+    def load(self):
+        with self._lock:
+            if os.path.exists(self.path):
+                try:
+                    with open(self.path, 'r', encoding='utf-8') as f:
+                        self._data = json.load(f)
+                except Exception as e:
+                    logger.error(f"Failed to load index registry, using legacy index: {e}")
+                    self._data = {}
+
+            if not self._data.get("versions"):
+                self._data = {
+                    "live": LEGACY_VERSION,
+                    "previous": None,
+                    "versions": {
+                        LEGACY_VERSION: {
+                            "name": LEGACY_VERSION,
+                            "namespace": "",
+                            "model_name": DEFAULT_MODEL_NAME,
+                            "recipe": "v1",
+                            "status": "live",
+                            "graph_path": os.getenv("LAB_GRAPH_PATH", "data/lab_graph.json"),
+                            "created_at": None,
+                        }
+                    },
+                }
+
+    def save(self):
+        """Atomically write the registry to disk"""
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._data, f, indent=2)
+            os.replace(tmp_path, self.path)
+
+    def live(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._data["versions"][self._data["live"]])
+
+    def previous(self) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            name = self._data.get("previous")
+            return dict(self._data["versions"][name]) if name else None
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            version = self._data["versions"].get(name)
+            return dict(version) if version else None
+
+    def versions(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(version) for version in self._data["versions"].values()]
+
+    def write_targets(self) -> List[Dict[str, Any]]:
+        """Live version first, then every version being built or awaiting cutover"""
+        with self._lock:
+            live = self._data["live"]
+            others = [
+                dict(version) for name, version in self._data["versions"].items()
+                if name != live and version["status"] in WRITE_STATUSES
+            ]
+            return [self.live()] + others
+
+    def create(self, model_name: str, recipe: str) -> Dict[str, Any]:
+        """Register a new version in the building state"""
+        created_at = datetime.now()
+        name = f"{model_slug(model_name)}--{recipe}--{created_at.strftime('%Y%m%d%H%M%S')}"
+        version = {
+            "name": name,
+            "namespace": name,
+            "model_name": model_name,
+            "recipe": recipe,
+            "status": "building",
+            "graph_path": os.path.join(os.path.dirname(self.path), f"lab_graph--{name}.json"),
+            "created_at": created_at.isoformat(),
+        }
+        with self._lock:
+            if name in self._data["versions"]:
+                raise ValueError(f"Index version {name} already exists")
+            self._data["versions"][name] = version
+            self.save()
+        return dict(version)
+
+    def update(self, name: str, **fields):
+        with self._lock:
+            self._data["versions"][name].update(fields)
+            self.save()
+
+    def set_live(self, name: str):
+        """Make a ready version live, keeping the current one for rollback"""
+        with self._lock:
+            version = self._data["versions"].get(name)
+            if version is None:
+                raise KeyError(name)
+            if version["status"] != "ready":
+                raise ValueError(f"Index version {name} is {version['status']}, not ready")
+
+            current = self._data["live"]
+            self._data["versions"][current]["status"] = "ready"
+            version["status"] = "live"
+            self._data["previous"] = current
+            self._data["live"] = name
+            self.save()
+
+    def rollback(self) -> str:
+        """Swap the live version back to the one it replaced"""
+        with self._lock:
+            previous = self._data.get("previous")
+            if not previous:
+                raise ValueError("No previous index version to roll back to")
+            self.set_live(previous)
+            return previous
+
+    def retire(self, name: str):
+        """Stop writing to a version that is neither live nor the rollback target"""
+        with self._lock:
+            if name in (self._data["live"], self._data.get("previous")):
+                raise ValueError(f"Index version {name} is live or the rollback target")
+            if name not in self._data["versions"]:
+                raise KeyError(name)
+            self._data["versions"][name]["status"] = "retired"
+            self.save()
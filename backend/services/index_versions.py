@@ -0,0 +1,391 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from models.lab_models import LabInfo
+from services.embed_recipes import EMBED_TEXT_RECIPES, build_embed_text
+from services.index_registry import IndexRegistry
+from services.ingest_service import lab_metadata
+from services.neighbor_graph import LabNeighborGraph
+from services.vector_service import VectorService
+
+logger = logging.getLogger(__name__)
+
+
+class ShadowStats:
+    """Rolling latency and result-overlap samples for one candidate version"""
+
+    def __init__(self, max_samples: int = 1000):
+        self._samples: deque = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+        self.errors = 0
+
+    def record(self, live_seconds: float, shadow_seconds: float, overlap: float):
+        with self._lock:
+            self._samples.append((live_seconds, shadow_seconds, overlap))
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            samples = list(self._samples)
+        if not samples:
+            return {"samples": 0, "errors": self.errors}
+
+        live, shadow, overlap = (np.array(column) for column in zip(*samples))
+        return {
+            "samples": len(samples),
+            "errors": self.errors,
+            "live_p50_ms": round(float(np.percentile(live, 50)) * 1000, 1),
+            "live_p95_ms": round(float(np.percentile(live, 95)) * 1000, 1),
+            "shadow_p50_ms": round(float(np.percentile(shadow, 50)) * 1000, 1),
+            "shadow_p95_ms": round(float(np.percentile(shadow, 95)) * 1000, 1),
+            "mean_overlap": round(float(overlap.mean()), 3),
+        }
+
+
+class IndexVersionManager:
+    """
+    Serves searches from the live index version and manages its replacements.
+
+    New versions are filled in the background at a throttled rate from the labs
+    the live version serves, while ingestion writes to every version in flight
+    and to each version's similar-labs graph. Once a version is ready, a sample
+    of live searches is replayed against it off the request path to compare
+    latency and top-k overlap before cutover.
+    """
+
+    def __init__(
+        self,
+        registry: IndexRegistry,
+        pinecone_service,
+        catalog_service,
+        vector_service: VectorService,
+        shadow_sample_rate: float = 0.1,
+        shadow_top_k: int = 10,
+        embed_batch_size: int = 32
+    ):
+        self.registry = registry
+        self.pinecone_service = pinecone_service
+        self.catalog_service = catalog_service
+        self.shadow_sample_rate = shadow_sample_rate
+        self.shadow_top_k = shadow_top_k
+        self.embed_batch_size = embed_batch_size
+        self._vector_services: Dict[str, VectorService] = {vector_service.model_name: vector_service}
+        self._shadow_stats: Dict[str, ShadowStats] = {}
+        self._shadow_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="shadow")
+        self._shadow_pending = 0
+        self._shadow_lock = threading.Lock()
+        self._build_tasks: Dict[str, "asyncio.Task[None]"] = {}
+        self._graphs: Dict[str, LabNeighborGraph] = {}
+        self._graphs_lock = threading.Lock()
+        self._fail_interrupted_builds()
+
+    def _fail_interrupted_builds(self):
+        """
+        Builds run as tasks in this process, so a version still marked building
+        at startup was cut off by a restart. Failing it stops ingestion writing
+        to a version that can never become ready.
+        """
+        for version in self.registry.versions():
+            if version["status"] == "building":
+                logger.warning(f"Index version {version['name']} was interrupted mid-build, marking it failed")
+                self.registry.update(
+                    version["name"],
+                    status="failed",
+                    error="Build interrupted by a restart; start a new build",
+                    finished_at=datetime.now().isoformat()
+                )
+
+    def vector_service_for(self, model_name: str) -> VectorService:
+        if model_name not in self._vector_services:
+            self._vector_services[model_name] = VectorService(model_name=model_name)
+        return self._vector_services[model_name]
+
+    def live(self) -> Dict[str, Any]:
+        return self.registry.live()
+
+    def live_vector_service(self) -> VectorService:
+        return self.vector_service_for(self.live()["model_name"])
+
+    def rank(
+        self,
+        version: Dict[str, Any],
+        query_vector: np.ndarray,
+        top_k: int,
+        metadata_filter: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[str, float]]:
+        return self.pinecone_service.rank_labs(
+            query_vector=query_vector, top_k=top_k, metadata_filter=metadata_filter, namespace=version["namespace"]
+        )
+
+    def shadow_candidate(self) -> Optional[Dict[str, Any]]:
+        """The newest ready version that is not live"""
+        candidates = [version for version in self.registry.versions() if version["status"] == "ready"]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda version: version.get("created_at") or "")
+
+    def submit_shadow(
+        self,
+        query_text: str,
+        query_vector: np.ndarray,
+        metadata_filter: Optional[Dict[str, Any]],
+        live_ranked: List[Tuple[str, float]],
+        live_embed_seconds: float,
+        live_rank_seconds: float
+    ):
+        """Replay a sampled live search against the shadow candidate without blocking the caller"""
+        if random.random() >= self.shadow_sample_rate:
+            return
+        candidate = self.shadow_candidate()
+        if candidate is None:
+            return
+
+        with self._shadow_lock:
+            # Drop samples rather than queue them up under load
+            if self._shadow_pending >= 4:
+                return
+            self._shadow_pending += 1
+
+        live_model = self.live()["model_name"]
+        self._shadow_executor.submit(
+            self._shadow, candidate, live_model, query_text, query_vector, metadata_filter, live_ranked,
+            live_embed_seconds, live_rank_seconds
+        )
+
+    def _shadow(
+        self, candidate, live_model, query_text, query_vector, metadata_filter, live_ranked,
+        live_embed_seconds, live_rank_seconds
+    ):
+        stats = self._shadow_stats.setdefault(candidate["name"], ShadowStats())
+        try:
+            # A recipe-only change shares the live model, so the live query embedding is reused
+            embed_seconds = live_embed_seconds
+            if candidate["model_name"] != live_model:
+                start = time.monotonic()
+                query_vector = self.vector_service_for(candidate["model_name"]).vectorize_text(query_text)
+                embed_seconds = time.monotonic() - start
+
+            start = time.monotonic()
+            shadow_ranked = self.rank(candidate, query_vector, self.shadow_top_k, metadata_filter)
+            shadow_seconds = embed_seconds + time.monotonic() - start
+            live_seconds = live_embed_seconds + live_rank_seconds
+
+            live_ids = {lab_id for lab_id, _ in live_ranked[:self.shadow_top_k]}
+            shadow_ids = {lab_id for lab_id, _ in shadow_ranked}
+            overlap = len(live_ids & shadow_ids) / max(1, len(live_ids))
+            stats.record(live_seconds, shadow_seconds, overlap)
+        except Exception as e:
+            stats.errors += 1
+            logger.warning(f"Shadow query against {candidate['name']} failed: {e}")
+        finally:
+            with self._shadow_lock:
+                self._shadow_pending -= 1
+
+    def graph_for(self, version: Dict[str, Any]) -> LabNeighborGraph:
+        """The similar-labs graph built from a version's vectors"""
+        with self._graphs_lock:
+            graph = self._graphs.get(version["graph_path"])
+            if graph is None:
+                graph = LabNeighborGraph(path=version["graph_path"])
+                self._graphs[version["graph_path"]] = graph
+            return graph
+
+    def update_graphs(self, vectors_by_version: Dict[str, Dict[str, np.ndarray]]):
+        """Merge upserted lab vectors into each version's graph and persist it"""
+        for name, vectors in vectors_by_version.items():
+            version = self.registry.get(name)
+            if version is None or not vectors:
+                continue
+            graph = self.graph_for(version)
+            # Merge into the graph as last written, possibly by the scraper in another process
+            graph.reload_if_changed()
+            graph.update(vectors)
+            graph.save()
+
+    def upsert_labs(self, labs: List[LabInfo]) -> Dict[str, List[np.ndarray]]:
+        """
+        Embed and upsert labs into every version receiving writes.
+
+        Returns each written version's vectors by version name. A failure on
+        the live version is raised; failures on other versions are logged so
+        ingestion is not blocked by a candidate.
+        """
+        vectors_by_version: Dict[str, List[np.ndarray]] = {}
+        records = [lab.model_dump() for lab in labs]
+        for version in self.registry.write_targets():
+            try:
+                vectors = self._embed_records(version, records)
+                upserted = self.pinecone_service.upsert_labs(
+                    [(lab.id, vector, lab_metadata(lab)) for lab, vector in zip(labs, vectors)],
+                    namespace=version["namespace"]
+                )
+                if not upserted:
+                    raise RuntimeError("Failed to upsert to Pinecone")
+            except Exception as e:
+                if version["status"] == "live":
+                    raise
+                logger.error(f"Failed to write {len(labs)} labs to index version {version['name']}: {e}")
+                continue
+
+            vectors_by_version[version["name"]] = vectors
+        return vectors_by_version
+
+    def _embed_records(self, version: Dict[str, Any], records: List[Dict[str, Any]]) -> List[np.ndarray]:
+        vector_service = self.vector_service_for(version["model_name"])
+        vectors: List[np.ndarray] = []
+        for start in range(0, len(records), self.embed_batch_size):
+            batch = records[start:start + self.embed_batch_size]
+            texts = [build_embed_text(record, version["recipe"]) for record in batch]
+            vectors.extend(vector_service.vectorize_text(texts))
+        return vectors
+
+    def _source_lab_ids(self, live: Dict[str, Any]) -> List[str]:
+        """Ids of every lab the live version serves, so a rebuild never drops ingested labs"""
+        lab_ids = self.pinecone_service.list_lab_ids(live["namespace"])
+        if lab_ids is None:
+            # Pod-based indexes cannot list ids; the cutover count check still guards against gaps
+            logger.warning(f"Cannot list labs in index version {live['name']}, building from the lab catalogue")
+            return [lab.id for lab in self.catalog_service.get_labs()]
+        return lab_ids
+
+    def _source_records(
+        self, live: Dict[str, Any], lab_ids: List[str]
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Return parallel lists of embed records and Pinecone metadata for labs.
+
+        Metadata is copied from the live version. Embed records add the
+        catalogue's raw fields, such as scraped page content, so a recipe
+        embeds the same text the scraper would.
+        """
+        live_metadata = self.pinecone_service.fetch_metadata(lab_ids, live["namespace"])
+        records, metadata = [], []
+        for lab_id in lab_ids:
+            source = self.catalog_service.get_record(lab_id) or {}
+            meta = live_metadata.get(lab_id)
+            if meta is None:
+                lab = self.catalog_service.get_lab(lab_id)
+                if lab is None:
+                    logger.warning(f"Skipping lab {lab_id}: not found in the live index or the catalogue")
+                    continue
+                meta = lab_metadata(lab)
+            records.append({**source, **meta, "id": lab_id})
+            metadata.append(meta)
+        return records, metadata
+
+    def start_build(self, model_name: str, recipe: str, labs_per_second: float) -> Dict[str, Any]:
+        """Register a new version and fill it in the background"""
+        if recipe not in EMBED_TEXT_RECIPES:
+            raise ValueError(f"Unknown embed text recipe: {recipe}")
+        if labs_per_second <= 0:
+            raise ValueError("labs_per_second must be positive")
+
+        version = self.registry.create(model_name, recipe)
+        task = asyncio.create_task(self._build(version, labs_per_second))
+        self._build_tasks[version["name"]] = task
+        task.add_done_callback(lambda _: self._build_tasks.pop(version["name"], None))
+        return version
+
+    async def _build(self, version: Dict[str, Any], labs_per_second: float):
+        name = version["name"]
+        try:
+            vector_service = self.vector_service_for(version["model_name"])
+            probe = await asyncio.to_thread(vector_service.vectorize_text, "dimension probe")
+            dimension = await asyncio.to_thread(self.pinecone_service.get_dimension)
+            if dimension and len(probe) != dimension:
+                raise ValueError(f"Model produces {len(probe)}-d vectors but the index is {dimension}-d")
+
+            live = self.live()
+            lab_ids = await asyncio.to_thread(self._source_lab_ids, live)
+            self.registry.update(name, total=len(lab_ids), built=0)
+            logger.info(f"Building index version {name} for {len(lab_ids)} labs at {labs_per_second} labs/s")
+
+            built_vectors: Dict[str, np.ndarray] = {}
+            for start in range(0, len(lab_ids), self.embed_batch_size):
+                current = self.registry.get(name)
+                if current is None or current["status"] != "building":
+                    logger.info(f"Stopped building index version {name}")
+                    return
+
+                batch_start = time.monotonic()
+                # Read each batch just before embedding it so labs ingested meanwhile are not overwritten
+                batch_ids = lab_ids[start:start + self.embed_batch_size]
+                records, metadata = await asyncio.to_thread(self._source_records, live, batch_ids)
+                vectors = await asyncio.to_thread(self._embed_records, version, records)
+                upserted = await asyncio.to_thread(
+                    self.pinecone_service.upsert_labs,
+                    [(record["id"], vector, meta) for record, vector, meta in zip(records, vectors, metadata)],
+                    version["namespace"]
+                )
+                if not upserted:
+                    raise RuntimeError("Failed to upsert to Pinecone")
+
+                built_vectors.update((record["id"], vector) for record, vector in zip(records, vectors))
+                self.registry.update(name, built=len(built_vectors))
+
+                # Throttle so the rebuild never competes with live traffic for the embedding API
+                await asyncio.sleep(max(0.0, len(batch_ids) / labs_per_second - (time.monotonic() - batch_start)))
+
+            if self.registry.get(name)["status"] != "building":
+                return
+
+            # Labs ingested during the build are already in this version's graph
+            await asyncio.to_thread(self.update_graphs, {name: built_vectors})
+
+            self.registry.update(name, status="ready", finished_at=datetime.now().isoformat())
+            logger.info(f"Index version {name} is ready for shadow reads and cutover")
+
+        except Exception as e:
+            logger.error(f"Failed to build index version {name}: {e}")
+            self.registry.update(name, status="failed", error=str(e))
+
+    def cutover(self, name: str) -> Dict[str, Any]:
+        """Switch searches to a ready version once it holds at least as many labs as live"""
+        version = self.registry.get(name)
+        if version is None:
+            raise KeyError(name)
+
+        live = self.live()
+        if version["name"] != live["name"]:
+            live_count = self.pinecone_service.get_namespace_count(live["namespace"])
+            version_count = self.pinecone_service.get_namespace_count(version["namespace"])
+            if live_count is None or version_count is None:
+                raise ValueError("Could not compare lab counts with the live index version")
+            if version_count < live_count:
+                raise ValueError(
+                    f"Index version {name} has {version_count} labs but the live version has {live_count}"
+                )
+
+        self.registry.set_live(name)
+        logger.info(f"Cut over to index version {name}")
+        return self.live()
+
+    def rollback(self) -> Dict[str, Any]:
+        name = self.registry.rollback()
+        logger.info(f"Rolled back to index version {name}")
+        return self.live()
+
+    def retire(self, name: str):
+        self.registry.retire(name)
+
+    def status(self) -> Dict[str, Any]:
+        live = self.live()
+        previous = self.registry.previous()
+        versions = []
+        for version in self.registry.versions():
+            stats = self._shadow_stats.get(version["name"])
+            versions.append({**version, "shadow": stats.summary() if stats else None})
+        return {
+            "live": live["name"],
+            "previous": previous["name"] if previous else None,
+            "shadow_candidate": (self.shadow_candidate() or {}).get("name"),
+            "versions": versions,
+        }
@@ -0,0 +1,149 @@
+import asyncio
+import json
+import logging
+import secrets
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from pydantic import ValidationError
+
+from models.lab_models import IngestJobStatus, IngestRecordError, LabInfo
+
+logger = logging.getLogger(__name__)
+
+
+def lab_metadata(lab: LabInfo) -> Dict[str, Any]:
+    """Build Pinecone metadata for a lab, dropping null fields Pinecone rejects"""
+    metadata = {key: value for key, value in lab.model_dump().items() if value is not None}
+    metadata["updated_at"] = datetime.now().isoformat()
+    return metadata
+
+
+def lab_id_error(lab: LabInfo, seen_ids: Optional[Set[str]] = None) -> Optional[str]:
+    """Return why a lab's id cannot be upserted, or None if it can"""
+    if not lab.id.strip():
+        return "id: must not be empty"
+    if seen_ids is not None and lab.id in seen_ids:
+        return "id: duplicate of an earlier line"
+    return None
+
+
+def parse_lab_line(
+    line: str, line_number: int, seen_ids: Set[str]
+) -> Tuple[Optional[LabInfo], Optional[IngestRecordError]]:
+    """
+    Validate one JSONL line against LabInfo.
+
+    Empty ids and ids already in seen_ids are rejected so one bad record never
+    fails a whole upsert chunk; accepted ids are added to seen_ids.
+    """
+    try:
+        record = json.loads(line)
+    except json.JSONDecodeError as e:
+        return None, IngestRecordError(line=line_number, error=f"Invalid JSON: {e}")
+
+    lab_id = record.get("id") if isinstance(record, dict) else None
+    try:
+        lab = LabInfo.model_validate(record)
+    except ValidationError as e:
+        message = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+        return None, IngestRecordError(line=line_number, lab_id=lab_id, error=message)
+
+    error = lab_id_error(lab, seen_ids)
+    if error:
+        return None, IngestRecordError(line=line_number, lab_id=lab.id, error=error)
+    seen_ids.add(lab.id)
+    return lab, None
+
+
+class IngestJobManager:
+    """
+    Runs bulk lab ingestion jobs in the background.
+
+    Jobs run one at a time so a large import never competes with itself for
+    the embedding API. Each job hands labs to upsert_labs in chunks off the
+    event loop and records per-record errors. upsert_labs embeds a chunk in
+    batches, upserts it and returns the vectors written to each index version
+    by version name, raising on failure.
+    """
+
+    def __init__(
+        self,
+        upsert_labs: Callable[[List[LabInfo]], Dict[str, List[np.ndarray]]],
+        on_ingested: Callable[[List[LabInfo], Dict[str, List[np.ndarray]]], None],
+        upsert_chunk_size: int = 100,
+        max_jobs: int = 100
+    ):
+        self.upsert_labs = upsert_labs
+        self.on_ingested = on_ingested
+        self.upsert_chunk_size = upsert_chunk_size
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, IngestJobStatus]" = OrderedDict()
+        self._tasks: Dict[str, "asyncio.Task[None]"] = {}
+        self._worker_lock: Optional[asyncio.Lock] = None
+
+    def submit(self, labs: List[Tuple[int, LabInfo]], errors: List[IngestRecordError], total: int) -> IngestJobStatus:
+        """Queue a job for validated (line number, lab) pairs"""
+        job = IngestJobStatus(
+            job_id=secrets.token_urlsafe(8),
+            status="queued",
+            total=total,
+            processed=len(errors),
+            failed=len(errors),
+            errors=list(errors),
+            created_at=datetime.now().isoformat()
+        )
+        self._jobs[job.job_id] = job
+        while len(self._jobs) > self.max_jobs:
+            oldest_id, oldest = next(iter(self._jobs.items()))
+            if oldest.status in ("queued", "running"):
+                break
+            del self._jobs[oldest_id]
+
+        task = asyncio.create_task(self._run(job, labs))
+        self._tasks[job.job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job.job_id, None))
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestJobStatus]:
+        return self._jobs.get(job_id)
+
+    async def _run(self, job: IngestJobStatus, labs: List[Tuple[int, LabInfo]]):
+        if self._worker_lock is None:
+            self._worker_lock = asyncio.Lock()
+
+        async with self._worker_lock:
+            job.status = "running"
+            try:
+                for start in range(0, len(labs), self.upsert_chunk_size):
+                    await self._ingest_chunk(job, labs[start:start + self.upsert_chunk_size])
+                job.status = "completed"
+            except Exception as e:
+                logger.error(f"Ingest job {job.job_id} failed: {e}")
+                job.status = "failed"
+            finally:
+                job.finished_at = datetime.now().isoformat()
+
+        logger.info(f"Ingest job {job.job_id} {job.status}: {job.succeeded} succeeded, {job.failed} failed")
+
+    async def _ingest_chunk(self, job: IngestJobStatus, chunk: List[Tuple[int, LabInfo]]):
+        labs = [lab for _, lab in chunk]
+        try:
+            vectors = await asyncio.to_thread(self.upsert_labs, labs)
+        except Exception as e:
+            self._fail(job, chunk, f"Failed to ingest: {e}")
+            return
+
+        job.processed += len(chunk)
+        job.succeeded += len(chunk)
+        try:
+            await asyncio.to_thread(self.on_ingested, labs, vectors)
+        except Exception as e:
+            logger.error(f"Failed to refresh indexes after ingest: {e}")
+
+    def _fail(self, job: IngestJobStatus, records: List[Tuple[int, LabInfo]], error: str):
+        job.processed += len(records)
+        job.failed += len(records)
+        job.errors.extend(IngestRecordError(line=line, lab_id=lab.id, error=error) for line, lab in records)
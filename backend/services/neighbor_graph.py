@@ -0,0 +1,193 @@
+import json
+import os
+import logging
+import tempfile
+import threading
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class LabNeighborGraph:
+    """
+    Precomputed k-nearest-neighbour graph between lab vectors.
+
+    The graph and the vectors it was built from are persisted to JSON so the
+    ingest pipeline can maintain it and the API can serve "similar labs" as a
+    dictionary lookup. Updates only recompute the neighbourhoods a changed lab
+    can affect instead of rebuilding the whole graph.
+    """
+
+    def __init__(self, path: Optional[str] = None, k: int = 10):
+        self.path = path or os.getenv("LAB_GRAPH_PATH", "data/lab_graph.json")
+        self.k = k
+        self._lock = threading.Lock()
+        self._vectors: Dict[str, np.ndarray] = {}
+        self._neighbors: Dict[str, List[Tuple[str, float]]] = {}
+        self._loaded_mtime: Optional[float] = None
+        self.load()
+
+    def load(self) -> bool:
+        """Load the graph from disk, if it exists"""
+        if not os.path.exists(self.path):
+            logger.info(f"Lab neighbour graph not found: {self.path}")
+            return False
+
+        try:
+            mtime = os.path.getmtime(self.path)
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+
+            with self._lock:
+                self.k = data.get("k", self.k)
+                self._vectors = {
+                    lab_id: np.array(vector, dtype=np.float32) for lab_id, vector in data.get("vectors", {}).items()
+                }
+                self._neighbors = {
+                    lab_id: [(neighbor_id, score) for neighbor_id, score in neighbors]
+                    for lab_id, neighbors in data.get("neighbors", {}).items()
+                }
+                self._loaded_mtime = mtime
+
+            logger.info(f"Loaded neighbour graph for {len(self._neighbors)} labs")
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to load lab neighbour graph: {e}")
+            return False
+
+    def reload_if_changed(self):
+        """Pick up a graph rewritten by the ingest pipeline in another process"""
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return
+        if mtime != self._loaded_mtime:
+            self.load()
+
+    def save(self):
+        """Atomically write the graph to disk"""
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+
+        # Hold the lock for the write so concurrent saves never interleave
+        with self._lock:
+            data = {
+                "k": self.k,
+                "vectors": {lab_id: vector.tolist() for lab_id, vector in self._vectors.items()},
+                "neighbors": {lab_id: neighbors for lab_id, neighbors in self._neighbors.items()},
+            }
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(data, f)
+                os.replace(tmp_path, self.path)
+            except Exception:
+                os.unlink(tmp_path)
+                raise
+            self._loaded_mtime = os.path.getmtime(self.path)
+
+    def update(self, changed: Dict[str, np.ndarray]):
+        """
+        Add or replace lab vectors and repair the affected neighbourhoods.
+        Labs whose vector did not change are ignored.
+
+        Changed labs get their lists recomputed. Other labs are recomputed only
+        if a changed lab was already among their neighbours (its score may have
+        dropped); otherwise a changed lab is merged in when it beats their k-th
+        neighbour.
+        """
+        with self._lock:
+            # Re-ingesting a lab with an identical vector leaves the graph untouched
+            normalized = {}
+            for lab_id, vector in changed.items():
+                vector = np.asarray(vector, dtype=np.float32)
+                vector = vector / np.linalg.norm(vector)
+                previous = self._vectors.get(lab_id)
+                if previous is None or not np.allclose(previous, vector, atol=1e-6):
+                    normalized[lab_id] = vector
+
+            if not normalized:
+                return
+
+            changed = normalized
+            self._vectors.update(changed)
+
+            ids = list(self._vectors)
+            matrix = np.stack([self._vectors[lab_id] for lab_id in ids])
+            changed_ids = list(changed)
+            # similarities[i, j] = cosine(ids[i], changed_ids[j])
+            similarities = matrix @ np.stack([self._vectors[lab_id] for lab_id in changed_ids]).T
+
+            changed_set = set(changed_ids)
+            recompute = set(changed_ids)
+            for row, lab_id in enumerate(ids):
+                if lab_id in changed_set:
+                    continue
+
+                neighbors = self._neighbors.get(lab_id, [])
+                if any(neighbor_id in changed_set for neighbor_id, _ in neighbors):
+                    recompute.add(lab_id)
+                    continue
+
+                threshold = neighbors[-1][1] if len(neighbors) >= self.k else -np.inf
+                candidates = [
+                    (changed_id, float(similarities[row, column]))
+                    for column, changed_id in enumerate(changed_ids)
+                    if similarities[row, column] > threshold
+                ]
+                if candidates:
+                    merged = sorted(neighbors + candidates, key=lambda item: item[1], reverse=True)
+                    self._neighbors[lab_id] = merged[:self.k]
+
+            for lab_id in recompute:
+                self._neighbors[lab_id] = self._nearest(lab_id, ids, matrix)
+
+        logger.info(f"Updated neighbour graph: {len(changed)} changed, {len(recompute)} recomputed")
+
+    def remove(self, lab_ids: List[str]):
+        """Drop labs from the graph and repair the neighbourhoods that listed them"""
+        with self._lock:
+            removed = {lab_id for lab_id in lab_ids if lab_id in self._vectors or lab_id in self._neighbors}
+            if not removed:
+                return
+
+            for lab_id in removed:
+                self._vectors.pop(lab_id, None)
+                self._neighbors.pop(lab_id, None)
+
+            recompute = [
+                lab_id for lab_id, neighbors in self._neighbors.items()
+                if any(neighbor_id in removed for neighbor_id, _ in neighbors)
+            ]
+            if recompute and self._vectors:
+                ids = list(self._vectors)
+                matrix = np.stack([self._vectors[lab_id] for lab_id in ids])
+                for lab_id in recompute:
+                    self._neighbors[lab_id] = self._nearest(lab_id, ids, matrix)
+
+        logger.info(f"Removed {len(removed)} labs from neighbour graph, {len(recompute)} recomputed")
+
+    def _nearest(self, lab_id: str, ids: List[str], matrix: np.ndarray) -> List[Tuple[str, float]]:
+        scores = matrix @ self._vectors[lab_id]
+        order = np.argsort(-scores)
+        neighbors = []
+        for index in order:
+            if ids[index] == lab_id:
+                continue
+            neighbors.append((ids[index], float(scores[index])))
+            if len(neighbors) == self.k:
+                break
+        return neighbors
+
+    def neighbors(self, lab_id: str, limit: Optional[int] = None) -> Optional[List[Tuple[str, float]]]:
+        """Return the precomputed nearest labs, or None for an unknown lab"""
+        neighbors = self._neighbors.get(lab_id)
+        if neighbors is None:
+            return None
+        return neighbors[:limit] if limit else list(neighbors)
+
+    def __contains__(self, lab_id: str) -> bool:
+        return lab_id in self._neighbors
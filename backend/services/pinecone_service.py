@@ -1,17 +1,18 @@
 from pinecone import Pinecone, ServerlessSpec
 import os
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import numpy as np
 
-from models.lab_models import LabMatch, LabInfo, PineconeMatch
+from models.lab_models import LabInfo, PineconeMatch
+from services.index_registry import index_name
 
 logger = logging.getLogger(__name__)
 
 class PineconeService:
     def __init__(self):
         self.api_key = os.getenv("PINECONE_API_KEY")
-        self.index_name = "collegelabmatch"  # Hardcoded index name
+        self.index_name = index_name()
         self.pc = None
         self.index = None
         
@@ -25,7 +26,7 @@ class PineconeService:
         try:
             self.pc = Pinecone(api_key=self.api_key)
             
-            # Use existing hardcoded index - don't create dynamically
+            # Use existing index - don't create dynamically
             self.index = self.pc.Index(self.index_name)
             logger.info(f"Connected to Pinecone index: {self.index_name}")
             
@@ -33,7 +34,7 @@ class PineconeService:
             logger.error(f"Failed to initialize Pinecone: {e}")
             raise
     
-    def upsert_lab(self, lab_id: str, vector: np.ndarray, metadata: Dict[str, Any]) -> bool:
+    def upsert_lab(self, lab_id: str, vector: np.ndarray, metadata: Dict[str, Any], namespace: str = "") -> bool:
         """
         Store or update a lab in the vector database
         
@@ -41,6 +42,7 @@ class PineconeService:
             lab_id: Unique identifier for the lab
             vector: Vector embedding of lab description
             metadata: Lab metadata (name, description, etc.)
+            namespace: Index version namespace to write to
             
         Returns:
             True if successful, False otherwise
@@ -52,7 +54,8 @@ class PineconeService:
         try:
             vector_list = vector.tolist()
             self.index.upsert(
-                vectors=[(lab_id, vector_list, metadata)]
+                vectors=[(lab_id, vector_list, metadata)],
+                namespace=namespace
             )
             
             logger.info(f"Successfully upserted lab {lab_id}")
@@ -62,68 +65,168 @@ class PineconeService:
             logger.error(f"Failed to upsert lab {lab_id}: {e}")
             return False
     
-    def search_similar_labs(self, query_vector: np.ndarray, top_k: int = 10) -> List[LabMatch]:
+    def upsert_labs(self, labs: List[Tuple[str, np.ndarray, Dict[str, Any]]], namespace: str = "") -> bool:
         """
-        Search for labs similar to the query vector
+        Store or update several labs in one request
+        
+        Args:
+            labs: (lab id, vector, metadata) tuples
+            namespace: Index version namespace to write to
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        if not self.index:
+            logger.error("Pinecone index not initialized")
+            return False
+        
+        try:
+            self.index.upsert(
+                vectors=[(lab_id, vector.tolist(), metadata) for lab_id, vector, metadata in labs],
+                namespace=namespace
+            )
+            
+            logger.info(f"Successfully upserted {len(labs)} labs")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Failed to upsert {len(labs)} labs: {e}")
+            return False
+    
+    def rank_labs(
+        self,
+        query_vector: np.ndarray,
+        top_k: int = 10,
+        metadata_filter: Optional[Dict[str, Any]] = None,
+        namespace: str = ""
+    ) -> List[Tuple[str, float]]:
+        """
+        Rank labs by similarity without fetching their metadata
         
         Args:
             query_vector: Vector embedding of user query
-            top_k: Number of results to return
+            top_k: Length of the ranked list to return
+            metadata_filter: Optional Pinecone metadata filter applied before ranking
+            namespace: Index version namespace to query
             
         Returns:
-            List of matching labs with similarity scores
+            List of (lab id, similarity score) pairs, best match first
         """
         if not self.index:
             logger.error("Pinecone index not initialized")
             return []
         
         try:
-            query_list = query_vector.tolist()
-            
             search_results = self.index.query(
-                vector=query_list,
+                vector=query_vector.tolist(),
                 top_k=top_k,
-                include_metadata=True
+                include_metadata=False,
+                filter=metadata_filter,
+                namespace=namespace
             )
-            
-            matches = []
-            for match in search_results.matches:
-                try:
-                    # Parse research_areas from string to list if needed
-                    research_areas = match.metadata.get('research_areas', '')
-                    if isinstance(research_areas, str):
-                        research_areas = [area.strip() for area in research_areas.split(',') if area.strip()]
-                    elif not isinstance(research_areas, list):
-                        research_areas = []
-                    
-                    # Create lab info with cleaned metadata
-                    lab_info = LabInfo(
-                        id=match.metadata.get('id', ''),
-                        name=match.metadata.get('name', ''),
-                        professor=match.metadata.get('professor', ''),
-                        description=match.metadata.get('description', ''),
-                        research_areas=research_areas,
-                        website=match.metadata.get('website', ''),
-                        email=match.metadata.get('email', '')
-                    )
-                    
-                    lab_match = LabMatch(
-                        lab=lab_info,
-                        similarity_score=float(match.score)
-                    )
-                    matches.append(lab_match)
-                except Exception as e:
-                    logger.warning(f"Failed to parse lab match: {e}")
-                    continue
-            
-            logger.info(f"Found {len(matches)} matching labs")
-            return matches
+            return [(match.id, float(match.score)) for match in search_results.matches]
             
         except Exception as e:
-            logger.error(f"Failed to search labs: {e}")
+            logger.error(f"Failed to rank labs: {e}")
             return []
     
-
+    def fetch_metadata(self, lab_ids: List[str], namespace: str = "") -> Dict[str, Dict[str, Any]]:
+        """
+        Fetch raw lab metadata for the given ids
+        
+        Args:
+            lab_ids: Ids of the labs to fetch
+            namespace: Index version namespace to read from
+            
+        Returns:
+            Mapping of lab id to metadata for every id found
+        """
+        if not self.index or not lab_ids:
+            return {}
+        
+        try:
+            response = self.index.fetch(ids=lab_ids, namespace=namespace)
+            return {lab_id: dict(vector.metadata or {}) for lab_id, vector in response.vectors.items()}
+            
+        except Exception as e:
+            logger.error(f"Failed to fetch labs: {e}")
+            return {}
+    
+    def fetch_vectors(self, lab_ids: List[str], namespace: str = "") -> Dict[str, np.ndarray]:
+        """
+        Fetch stored lab vectors for the given ids
+        
+        Args:
+            lab_ids: Ids of the labs to fetch
+            namespace: Index version namespace to read from
+            
+        Returns:
+            Mapping of lab id to vector for every id found
+        """
+        if not self.index or not lab_ids:
+            return {}
+        
+        try:
+            response = self.index.fetch(ids=lab_ids, namespace=namespace)
+            return {
+                lab_id: np.array(vector.values, dtype=np.float32) for lab_id, vector in response.vectors.items()
+            }
+            
+        except Exception as e:
+            logger.error(f"Failed to fetch lab vectors: {e}")
+            return {}
+    
+    def fetch_labs(self, lab_ids: List[str], namespace: str = "") -> Dict[str, LabInfo]:
+        """
+        Fetch lab metadata for the given ids
+        
+        Args:
+            lab_ids: Ids of the labs to fetch
+            namespace: Index version namespace to read from
+            
+        Returns:
+            Mapping of lab id to lab info for every id found
+        """
+        labs = {}
+        for lab_id, metadata in self.fetch_metadata(lab_ids, namespace).items():
+            try:
+                labs[lab_id] = LabInfo.from_metadata(metadata)
+            except Exception as e:
+                logger.warning(f"Failed to parse lab {lab_id}: {e}")
+        return labs
+    
+    def list_lab_ids(self, namespace: str = "") -> Optional[List[str]]:
+        """
+        List every lab id stored in a namespace
+        
+        Returns:
+            Lab ids, or None if the index does not support listing
+        """
+        if not self.index:
+            return None
+        
+        try:
+            lab_ids = []
+            for page in self.index.list(namespace=namespace):
+                lab_ids.extend(page)
+            return lab_ids
+            
+        except Exception as e:
+            logger.error(f"Failed to list labs in namespace '{namespace}': {e}")
+            return None
+    
+    def get_namespace_count(self, namespace: str = "") -> Optional[int]:
+        """Number of labs stored in a namespace, or None if it cannot be read"""
+        if not self.index:
+            return None
+        
+        try:
+            stats = self.index.describe_index_stats()
+            summary = stats.namespaces.get(namespace)
+            return summary.vector_count if summary else 0
+        except Exception as e:
+            logger.error(f"Failed to get lab count for namespace '{namespace}': {e}")
+            return None
     
     def get_lab_count(self) -> int:
         if not self.index:
@@ -136,6 +239,16 @@ class PineconeService:
             logger.error(f"Failed to get lab count: {e}")
             return 0
     
+    def get_dimension(self) -> Optional[int]:
+        if not self.index:
+            return None
+        
+        try:
+            return self.index.describe_index_stats().dimension
+        except Exception as e:
+            logger.error(f"Failed to get index dimension: {e}")
+            return None
+    
     def delete_lab(self, lab_id: str) -> bool:
         if not self.index:
             logger.error("Pinecone index not initialized")
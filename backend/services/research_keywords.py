@@ -0,0 +1,10 @@
+# Common robotics research areas, matched against scraped lab pages and
+# offered as search suggestions
+RESEARCH_KEYWORDS = [
+    "autonomous systems", "computer vision", "machine learning", "artificial intelligence",
+    "human-robot interaction", "control systems", "perception", "manipulation",
+    "mobile robotics", "autonomous vehicles", "drones", "medical robotics",
+    "surgical robotics", "humanoid robots", "robot learning", "SLAM",
+    "path planning", "motion planning", "sensor fusion", "localization",
+    "robot perception", "robotic manipulation", "swarm robotics", "bio-inspired robotics"
+]
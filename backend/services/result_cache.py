@@ -0,0 +1,71 @@
+import base64
+import json
+import logging
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+RankedList = List[Tuple[str, float]]
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+class RankedResultCache:
+    """
+    Short-lived cache of full ranked id lists, addressed by opaque cursors.
+
+    A search stores its ranked (lab id, score) list once; later pages are sliced
+    from it so paging never repeats the embedding or the vector query.
+    """
+
+    def __init__(self, ttl_seconds: float = 600, max_entries: int = 1000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, RankedList]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def store(self, ranked: RankedList) -> str:
+        """Cache a ranked list and return its key"""
+        key = secrets.token_urlsafe(12)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, ranked)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return key
+
+    def get(self, key: str) -> Optional[RankedList]:
+        """Return the cached ranked list, or None if unknown or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, ranked = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            return ranked
+
+    @staticmethod
+    def encode_cursor(key: str, offset: int, page_size: int) -> str:
+        payload = json.dumps({"k": key, "o": offset, "n": page_size}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[str, int, int]:
+        """Decode a cursor into (key, offset, page size)"""
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+            key, offset, page_size = str(payload["k"]), int(payload["o"]), int(payload["n"])
+        except Exception as e:
+            raise InvalidCursorError(f"Invalid cursor: {e}")
+
+        if offset < 0 or page_size < 1:
+            raise InvalidCursorError("Invalid cursor: out of range")
+        return key, offset, page_size
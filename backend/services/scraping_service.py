@@ -5,11 +5,18 @@ import json
 import os
 from datetime import datetime
 import logging
-from urllib.parse import urljoin
+import hashlib
+import re
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit
 from dotenv import load_dotenv
 from crawl4ai import AsyncWebCrawler
 import google.generativeai as genai
 
+try:
+    from .research_keywords import RESEARCH_KEYWORDS
+except ImportError:
+    from research_keywords import RESEARCH_KEYWORDS
+
 # Load environment variables
 load_dotenv()
 
@@ -20,6 +27,19 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Near-duplicate detection: pages whose 64-bit SimHash fingerprints differ
+# in at most this many bits are treated as mirrors of the same lab site
+SIMHASH_BITS = 64
+SIMHASH_MAX_DISTANCE = 3
+# Pages with fewer tokens (e.g. JS-rendered shells) fingerprint alike, so they are never deduplicated
+SIMHASH_MIN_TOKENS = 50
+
+# Query parameters that only track the visitor and never select a different page
+TRACKING_PARAMS = {"fbclid", "gclid", "msclkid", "mc_cid", "mc_eid", "_ga", "_gl"}
+
+# Ids of labs the scraper has written, so labs dropped from a later run can be deleted
+SCRAPED_IDS_PATH = "data/scraped_lab_ids.json"
+
 
 async def scrape_labs_to_json():
     try:
@@ -48,32 +68,71 @@ async def scrape_labs_to_json():
         genai.configure(api_key=gemini_api_key)
         gemini_client = genai.GenerativeModel('gemini-2.0-flash')
 
+        # Group professors by canonical lab URL so each lab site is crawled once
+        lab_sites = {}
+        for link in faculty_links:
+            href = link.get('href')
+            if not href:
+                continue
+
+            full_faculty_url = urljoin(base_url, href)
+            logger.debug(f"Processing faculty member: {full_faculty_url}")
+
+            faculty_lab = extract_faculty_lab_site(full_faculty_url)
+            if not faculty_lab:
+                continue
+
+            professor_name, lab_url = faculty_lab
+            try:
+                canonical_url = canonicalize_url(lab_url)
+            except ValueError as e:
+                logger.warning(f"Skipping malformed lab URL {lab_url}: {e}")
+                continue
+            site = lab_sites.setdefault(canonical_url, {"url": lab_url, "professors": []})
+            if professor_name not in site["professors"]:
+                site["professors"].append(professor_name)
+
+        logger.info(f"Found {len(lab_sites)} unique lab sites")
+
         async with AsyncWebCrawler(verbose=True) as crawler:
             labs_data = []
+            fingerprints = []
 
-            for link in faculty_links:
-                href = link.get('href')
-                if not href:
-                    continue
-
-                full_faculty_url = urljoin(base_url, href)
-                logger.debug(f"Processing faculty member: {full_faculty_url}")
-                
+            for canonical_url, site in lab_sites.items():
                 try:
-                    lab_data = await process_faculty_page_enhanced(full_faculty_url, base_url, crawler, gemini_client)
-                    if lab_data:
-                        lab_data["id"] = f"lab_{len(labs_data) + 1}"
-                        labs_data.append(lab_data)
-                        logger.info(f"Saved lab: {lab_data.get('name', 'Unknown')}")
-                        
+                    result = await crawl_lab_site(site["url"], crawler)
+                    if not result:
+                        continue
+
+                    page_text, lab_name = result
+
+                    # Mirrored pages under different URLs are merged into the existing lab
+                    fingerprint = simhash(page_text)
+                    duplicate = find_near_duplicate(fingerprint, fingerprints)
+                    if duplicate is not None:
+                        merge_professors(labs_data[duplicate], site["professors"])
+                        logger.info(f"Merged near-duplicate lab site {site['url']} into {labs_data[duplicate]['name']}")
+                        continue
+
+                    lab_data = await build_lab_data(page_text, lab_name, site["url"], site["professors"], gemini_client)
+                    lab_data["id"] = lab_id_for(canonical_url)
+                    labs_data.append(lab_data)
+                    fingerprints.append(fingerprint)
+                    logger.info(f"Saved lab: {lab_data.get('name', 'Unknown')}")
+
                 except Exception as e:
-                    logger.error(f"Error processing {full_faculty_url}: {str(e)}")
+                    logger.error(f"Error processing {site['url']}: {str(e)}")
                     continue
         
             # Save to JSON file
             os.makedirs("data", exist_ok=True)
             output_filename = "data/labs_data.json"
             
+            # Remember the previous run's ids so update_pinecone_from_json can delete dropped labs
+            if os.path.exists(output_filename):
+                with open(output_filename, 'r', encoding='utf-8') as f:
+                    save_scraped_ids(load_scraped_ids() | {lab["id"] for lab in json.load(f) if lab.get("id")})
+            
             with open(output_filename, 'w', encoding='utf-8') as f:
                 json.dump(labs_data, f, indent=2, ensure_ascii=False)
             
@@ -85,7 +144,10 @@ async def scrape_labs_to_json():
         return False
 
 
-async def process_faculty_page_enhanced(faculty_url, base_url, crawler, gemini_client):
+def extract_faculty_lab_site(faculty_url):
+    """
+    Extract the professor name and linked lab website from a faculty page
+    """
     try:
         faculty_response = requests.get(faculty_url)
         faculty_soup = BeautifulSoup(faculty_response.text, 'html.parser')
@@ -105,42 +167,152 @@ async def process_faculty_page_enhanced(faculty_url, base_url, crawler, gemini_c
         full_lab_url = urljoin(faculty_url, lab_site_link)
         logger.debug(f"Found lab site: {full_lab_url}")
 
-        try:
-            result = await crawler.arun(url=full_lab_url)
-            if result.success:
-                page_text = result.markdown
-                
-                # Get lab name from title
-                soup = BeautifulSoup(result.html, 'html.parser')
-                lab_name = soup.title.string if soup.title else "Unknown Lab"
-                
-                # Generate AI description
-                ai_description = await generate_lab_description(page_text, lab_name, gemini_client)
-                
-                lab_data = {
-                    "name": lab_name.strip(),
-                    "professor": professor_name,
-                    "url": full_lab_url,
-                    "content": page_text[:10000],  # Limit content length
-                    "description": ai_description or lab_name.strip(),
-                    "research_areas": extract_research_areas(page_text),
-                    "scraped_at": datetime.now().isoformat()
-                }
-                
-                return lab_data
-            else:
-                logger.warning(f"Crawl4ai failed for {full_lab_url}: {result.error_message}")
-                return None
-                
-        except Exception as e:
-            logger.error(f"Error using crawl4ai for {full_lab_url}: {e}")
-            return None
+        return professor_name, full_lab_url
         
     except Exception as e:
         logger.error(f"Error processing faculty page {faculty_url}: {str(e)}")
         return None
 
 
+async def crawl_lab_site(lab_url, crawler):
+    """
+    Crawl a lab website and return its markdown content and page title
+    """
+    try:
+        result = await crawler.arun(url=lab_url)
+        if result.success:
+            # Get lab name from title
+            soup = BeautifulSoup(result.html, 'html.parser')
+            lab_name = soup.title.string if soup.title and soup.title.string else "Unknown Lab"
+            return result.markdown, lab_name
+        else:
+            logger.warning(f"Crawl4ai failed for {lab_url}: {result.error_message}")
+            return None
+            
+    except Exception as e:
+        logger.error(f"Error using crawl4ai for {lab_url}: {e}")
+        return None
+
+
+async def build_lab_data(page_text, lab_name, lab_url, professors, gemini_client):
+    # Generate AI description
+    ai_description = await generate_lab_description(page_text, lab_name, gemini_client)
+    
+    return {
+        "name": lab_name.strip(),
+        "professor": ", ".join(professors),
+        "url": lab_url,
+        "content": page_text[:10000],  # Limit content length
+        "description": ai_description or lab_name.strip(),
+        "research_areas": extract_research_areas(page_text),
+        "scraped_at": datetime.now().isoformat()
+    }
+
+
+def merge_professors(lab_data, professors):
+    """
+    Add professors to an existing lab record, skipping ones already listed
+    """
+    existing = [name.strip() for name in lab_data.get("professor", "").split(",") if name.strip()]
+    for professor in professors:
+        if professor not in existing:
+            existing.append(professor)
+    lab_data["professor"] = ", ".join(existing)
+
+
+def canonicalize_url(url):
+    """
+    Normalize a lab URL so trivially different links to the same site compare equal.
+    Scheme and "www." are dropped, host is lowercased, default ports, fragments,
+    tracking query parameters, trailing slashes and index pages are removed,
+    and the remaining query parameters are sorted.
+    """
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+
+    path = re.sub(r"/{2,}", "/", parts.path)
+    path = re.sub(r"/index\.(html?|php)$", "/", path, flags=re.IGNORECASE)
+    path = path.rstrip("/")
+
+    params = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    )
+    query = f"?{urlencode(params)}" if params else ""
+
+    return f"{host}{path}{query}"
+
+
+def lab_id_for(canonical_url):
+    """
+    Derive a stable lab id from its canonical URL, so ids survive reruns that
+    add, drop or merge other labs
+    """
+    return f"lab_{hashlib.sha1(canonical_url.encode('utf-8')).hexdigest()[:12]}"
+
+
+def load_scraped_ids():
+    if not os.path.exists(SCRAPED_IDS_PATH):
+        return set()
+    with open(SCRAPED_IDS_PATH, 'r', encoding='utf-8') as f:
+        return set(json.load(f))
+
+
+def load_ingested_ids():
+    """Ids of labs ingested through the API, which the scraper must never delete"""
+    path = os.getenv("INGESTED_LABS_PATH", "data/ingested_labs.json")
+    if not os.path.exists(path):
+        return set()
+    with open(path, 'r', encoding='utf-8') as f:
+        return {lab.get("id") for lab in json.load(f)}
+
+
+def save_scraped_ids(lab_ids):
+    os.makedirs(os.path.dirname(SCRAPED_IDS_PATH), exist_ok=True)
+    with open(SCRAPED_IDS_PATH, 'w', encoding='utf-8') as f:
+        json.dump(sorted(lab_ids), f, indent=2)
+
+
+def simhash(text, bits=SIMHASH_BITS):
+    """
+    Compute a SimHash fingerprint over word 3-shingles of the page text.
+    Returns None for pages too short to fingerprint reliably.
+    """
+    tokens = re.findall(r"\w+", text.lower())
+    if len(tokens) < SIMHASH_MIN_TOKENS:
+        return None
+    shingles = [" ".join(tokens[i:i + 3]) for i in range(len(tokens) - 2)]
+
+    weights = [0] * bits
+    for shingle in shingles:
+        digest = int.from_bytes(hashlib.md5(shingle.encode("utf-8")).digest()[:bits // 8], "big")
+        for bit in range(bits):
+            weights[bit] += 1 if digest >> bit & 1 else -1
+
+    fingerprint = 0
+    for bit in range(bits):
+        if weights[bit] > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def find_near_duplicate(fingerprint, fingerprints, max_distance=SIMHASH_MAX_DISTANCE):
+    """
+    Return the index of the first fingerprint within max_distance bits, or None.
+    Pages without a fingerprint never match.
+    """
+    if fingerprint is None:
+        return None
+    for i, other in enumerate(fingerprints):
+        if other is not None and bin(fingerprint ^ other).count("1") <= max_distance:
+            return i
+    return None
+
+
 async def generate_lab_description(page_content, lab_name, gemini_client):
     try:
         content_sample = page_content[:10000] if len(page_content) > 10000 else page_content
@@ -211,18 +383,8 @@ def extract_research_areas(page_content):
     try:
         content_lower = page_content.lower()
         
-        # Common robotics research areas
-        research_keywords = [
-            "autonomous systems", "computer vision", "machine learning", "artificial intelligence",
-            "human-robot interaction", "control systems", "perception", "manipulation",
-            "mobile robotics", "autonomous vehicles", "drones", "medical robotics",
-            "surgical robotics", "humanoid robots", "robot learning", "SLAM",
-            "path planning", "motion planning", "sensor fusion", "localization",
-            "robot perception", "robotic manipulation", "swarm robotics", "bio-inspired robotics"
-        ]
-        
         found_areas = []
-        for keyword in research_keywords:
+        for keyword in RESEARCH_KEYWORDS:
             if keyword in content_lower:
                 found_areas.append(keyword.title())
         
@@ -250,16 +412,27 @@ async def update_pinecone_from_json():
             logger.error("PINECONE_API_KEY not found in environment variables")
             return False
         
-        pc = Pinecone(api_key=api_key)
-        index = pc.Index("collegelabmatch")
-        
         # Initialize vector service
         try:
             from .vector_service import VectorService
+            from .neighbor_graph import LabNeighborGraph
+            from .index_registry import IndexRegistry, index_name
+            from .embed_recipes import build_embed_text
         except ImportError:
             from vector_service import VectorService
+            from neighbor_graph import LabNeighborGraph
+            from index_registry import IndexRegistry, index_name
+            from embed_recipes import build_embed_text
+        
+        pc = Pinecone(api_key=api_key)
+        index = pc.Index(index_name())
         
-        vector_service = VectorService()
+        # Write to the live index version and any version being built or awaiting cutover
+        targets = IndexRegistry().write_targets()
+        vector_services = {}
+        for target in targets:
+            if target["model_name"] not in vector_services:
+                vector_services[target["model_name"]] = VectorService(model_name=target["model_name"])
         
         # Load JSON data
         json_file = "data/labs_data.json"
@@ -274,20 +447,9 @@ async def update_pinecone_from_json():
         
         # Process each lab
         success_count = 0
+        changed_vectors = {target["name"]: {} for target in targets}
         for lab in labs_data:
             try:
-                # Use AI-generated description for vectorization instead of raw content
-                ai_description = lab.get('description', '')
-                if not ai_description or ai_description == lab.get('name', ''):
-                    # Fallback to name + limited content if no AI description available
-                    description = f"{lab.get('name', '')} {lab.get('content', '')[:500]}"
-                else:
-                    # Use the AI-generated description for vectorization
-                    description = f"{lab.get('name', '')} {ai_description}"
-                
-                # Vectorize lab description
-                lab_vector = vector_service.vectorize_text(description)
-                
                 # Prepare metadata for Pinecone
                 metadata = {
                     "id": lab.get("id", f"lab_{success_count}"),
@@ -300,11 +462,25 @@ async def update_pinecone_from_json():
                     "updated_at": datetime.now().isoformat()
                 }
                 
-                # Upsert to Pinecone directly
-                vector_list = lab_vector.tolist()
-                index.upsert(
-                    vectors=[(lab.get("id", f"lab_{success_count}"), vector_list, metadata)]
-                )
+                for target in targets:
+                    is_live = target["status"] == "live"
+                    try:
+                        # Vectorize lab with the version's model and embed text recipe
+                        description = build_embed_text(lab, target["recipe"])
+                        lab_vector = vector_services[target["model_name"]].vectorize_text(description)
+                        
+                        # Upsert to Pinecone directly
+                        index.upsert(
+                            vectors=[(metadata["id"], lab_vector.tolist(), metadata)],
+                            namespace=target["namespace"]
+                        )
+                    except Exception as e:
+                        if is_live:
+                            raise
+                        logger.error(f"Error writing lab {lab.get('name', 'unknown')} to index version {target['name']}: {e}")
+                        continue
+                    
+                    changed_vectors[target["name"]][metadata["id"]] = lab_vector
                 
                 success_count += 1
                 logger.info(f"Updated lab in Pinecone: {lab.get('name')}")
@@ -314,6 +490,36 @@ async def update_pinecone_from_json():
                 continue
         
         logger.info(f"Successfully updated {success_count}/{len(labs_data)} labs in Pinecone")
+        
+        # Labs from earlier runs that were merged away or disappeared, never ones ingested through the API
+        current_ids = {lab.get("id") for lab in labs_data if lab.get("id")}
+        stale_ids = load_scraped_ids() - current_ids - load_ingested_ids() if success_count else set()
+        failed_ids = set()
+        
+        for target in targets:
+            deleted_ids = set()
+            if stale_ids:
+                try:
+                    index.delete(ids=sorted(stale_ids), namespace=target["namespace"])
+                    deleted_ids = stale_ids
+                    logger.info(f"Deleted {len(stale_ids)} stale labs from index version {target['name']}")
+                except Exception as e:
+                    # Keep them recorded so the next run retries the delete
+                    failed_ids |= stale_ids
+                    logger.error(f"Failed to delete stale labs from index version {target['name']}: {e}")
+            
+            # Refresh the version's similar-labs graph around the labs that were upserted or deleted
+            try:
+                neighbor_graph = LabNeighborGraph(path=target["graph_path"])
+                neighbor_graph.remove(sorted(deleted_ids))
+                neighbor_graph.update(changed_vectors[target["name"]])
+                neighbor_graph.save()
+            except Exception as e:
+                logger.error(f"Failed to update lab neighbour graph for index version {target['name']}: {e}")
+        
+        if success_count:
+            save_scraped_ids(current_ids | failed_ids)
+        
         return success_count > 0
         
     except Exception as e:
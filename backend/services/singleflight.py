@@ -0,0 +1,55 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlightTimeout(Exception):
+    """Raised when a caller gives up waiting on a shared computation"""
+
+
+class SingleFlight:
+    """
+    Collapse concurrent identical calls into one in-flight computation.
+
+    The first caller for a key starts the work; callers arriving while it runs
+    await the same task and receive its result or its exception. Nothing is
+    cached once the task finishes, so results are never stale.
+    """
+
+    def __init__(self, timeout: float = 30.0):
+        self.timeout = timeout
+        self._inflight: Dict[Hashable, "asyncio.Future[Any]"] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]], timeout: Optional[float] = None) -> T:
+        """
+        Run fn once for all concurrent callers with the same key.
+
+        A caller that waits longer than the timeout gets SingleFlightTimeout;
+        the shared computation keeps running for the remaining callers.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            logger.debug(f"Joining in-flight computation for {key!r}")
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), timeout or self.timeout)
+        except asyncio.TimeoutError:
+            raise SingleFlightTimeout(f"Timed out waiting for {key!r}")
+
+    def _forget(self, key: Hashable, task: "asyncio.Future[Any]"):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved even if every caller timed out
+        if not task.cancelled():
+            task.exception()
+
+    def __len__(self) -> int:
+        return len(self._inflight)
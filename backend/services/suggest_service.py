@@ -0,0 +1,200 @@
+import hashlib
+import heapq
+import logging
+import re
+import threading
+from collections import Counter, OrderedDict
+from typing import List, Dict, Optional, Set, Tuple
+
+import numpy as np
+
+from services.research_keywords import RESEARCH_KEYWORDS
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def is_suggestible(query: str) -> bool:
+    """Whether a normalized search query may be offered to other users as a suggestion"""
+    if len(query) > 60 or len(query.split()) > 6:
+        return False
+    if any(marker in query for marker in ("http", "www.", "@", "/")):
+        return False
+    return bool(re.fullmatch(r"[a-z0-9][a-z0-9 ,&'+.-]*", query))
+
+
+class _TrieNode:
+    __slots__ = ("children", "text", "weight")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.text: Optional[str] = None
+        self.weight = 0
+
+
+class PrefixTrie:
+    """Character trie over normalized suggestion terms, ranked by weight"""
+
+    def __init__(self):
+        self._root = _TrieNode()
+        self._size = 0
+
+    def insert(self, text: str, weight: int = 1):
+        """Insert a term, adding to its weight if already present"""
+        node = self._root
+        for char in normalize_query(text):
+            node = node.children.setdefault(char, _TrieNode())
+        if node.text is None:
+            node.text = text
+            self._size += 1
+        node.weight += weight
+
+    def complete(self, prefix: str, limit: int = 8) -> List[Tuple[str, int]]:
+        """Return up to limit (term, weight) pairs starting with prefix, heaviest first"""
+        node = self._root
+        for char in normalize_query(prefix):
+            node = node.children.get(char)
+            if node is None:
+                return []
+
+        terms = []
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if current.text is not None:
+                terms.append((current.text, current.weight))
+            stack.extend(current.children.values())
+
+        return heapq.nsmallest(limit, terms, key=lambda item: (-item[1], item[0]))
+
+    def __len__(self) -> int:
+        return self._size
+
+
+class SuggestService:
+    """
+    Query autocomplete over the lab catalogue and popular searches.
+
+    Suggestions come from the research keyword list, catalogue research areas
+    and lab names, weighted by how often they occur, plus popular queries.
+    A query is promoted only at rebuild time, once at least min_query_clients
+    distinct clients searched it and got results within the current or
+    previous rebuild window. At most max_tracked_queries queries are tracked
+    per window. Every suggestion is embedded at build time so searching for
+    one skips the embedding round trip.
+    """
+
+    def __init__(
+        self, vector_service, catalog_service, min_query_clients: int = 5, batch_size: int = 32,
+        max_tracked_queries: int = 10000
+    ):
+        self.vector_service = vector_service
+        self.catalog_service = catalog_service
+        self.min_query_clients = min_query_clients
+        self.batch_size = batch_size
+        self.max_tracked_queries = max_tracked_queries
+        self._lock = threading.Lock()
+        self._trie = PrefixTrie()
+        self._embeddings: Dict[str, np.ndarray] = {}
+        # Hashed ids of clients that searched each query, least recently searched first
+        self._query_clients: "OrderedDict[str, Set[str]]" = OrderedDict()
+        self._previous_query_clients: Dict[str, Set[str]] = {}
+        self._display: Dict[str, str] = {}
+
+    def build(self):
+        """Rebuild the trie and precompute suggestion embeddings"""
+        weights: Counter = Counter()
+        display: Dict[str, str] = {}
+
+        def add(text: str, weight: int):
+            key = normalize_query(text)
+            if not key:
+                return
+            display.setdefault(key, text.strip())
+            weights[key] += weight
+
+        for lab in self.catalog_service.get_labs():
+            add(lab.name, 1)
+            for area in lab.research_areas:
+                add(area, 1)
+        for keyword in RESEARCH_KEYWORDS:
+            add(keyword, 1)
+        with self._lock:
+            popular = {}
+            for query in set(self._query_clients) | set(self._previous_query_clients):
+                clients = self._query_clients.get(query, set()) | self._previous_query_clients.get(query, set())
+                if len(clients) >= self.min_query_clients:
+                    popular[self._display.get(query, query)] = len(clients)
+            # Start a new window so queries nobody searches any more age out after two rebuilds
+            self._previous_query_clients = dict(self._query_clients)
+            self._query_clients = OrderedDict()
+            self._display = {
+                query: text for query, text in self._display.items() if query in self._previous_query_clients
+            }
+        for query, clients in popular.items():
+            add(query, clients)
+
+        trie = PrefixTrie()
+        for key, weight in weights.items():
+            trie.insert(display[key], weight)
+
+        with self._lock:
+            vector_service = self.vector_service
+            embeddings = dict(self._embeddings)
+        pending = [key for key in weights if key not in embeddings]
+        for start in range(0, len(pending), self.batch_size):
+            batch = pending[start:start + self.batch_size]
+            try:
+                vectors = vector_service.vectorize_text([display[key] for key in batch])
+                embeddings.update(zip(batch, vectors))
+            except Exception as e:
+                logger.error(f"Failed to embed suggestion batch: {e}")
+
+        with self._lock:
+            self._trie = trie
+            # Discard embeddings made with a model that was swapped out mid-build
+            if self.vector_service is vector_service:
+                self._embeddings = {key: embeddings[key] for key in weights if key in embeddings}
+
+        logger.info(f"Built {len(trie)} suggestions, {len(self._embeddings)} pre-embedded")
+
+    def suggest(self, prefix: str, limit: int = 8) -> List[str]:
+        if not prefix.strip():
+            return []
+        return [text for text, _ in self._trie.complete(prefix, limit)]
+
+    def get_embedding(self, text: str, model_name: str) -> Optional[np.ndarray]:
+        """Return the precomputed embedding when text is a known suggestion for this model"""
+        if self.vector_service.model_name != model_name:
+            return None
+        return self._embeddings.get(normalize_query(text))
+
+    def reset(self, vector_service):
+        """Switch embedding model, dropping embeddings made with the old one"""
+        with self._lock:
+            self.vector_service = vector_service
+            self._embeddings = {}
+
+    def record_query(self, text: str, client_id: str, result_count: int):
+        """
+        Count a searched query towards promotion at the next rebuild. Only
+        short, word-like queries that returned results are tracked.
+        """
+        key = normalize_query(text)
+        if not key or result_count <= 0 or not is_suggestible(key):
+            return
+        client = hashlib.sha256(client_id.encode("utf-8")).hexdigest()[:16]
+        with self._lock:
+            clients = self._query_clients.pop(key, set())
+            # Once a query has enough clients the rest are not needed
+            if len(clients) < self.min_query_clients:
+                clients.add(client)
+            self._query_clients[key] = clients
+            self._display.setdefault(key, text.strip())
+            while len(self._query_clients) > self.max_tracked_queries:
+                evicted, _ = self._query_clients.popitem(last=False)
+                if evicted not in self._previous_query_clients:
+                    self._display.pop(evicted, None)
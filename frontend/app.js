@@ -3,6 +3,7 @@ class LabMatcher {
         this.apiBaseUrl = '/api';
         this.currentMode = 'resume'; // 'text' or 'resume'
         this.selectedFile = null;
+        this.suggestTimer = null;
         this.initializeElements();
         this.bindEvents();
         this.setupFileUpload();
@@ -13,10 +14,12 @@ class LabMatcher {
         // Form elements
         this.searchForm = document.getElementById('searchForm');
         this.keywordsInput = document.getElementById('keywords');
+        this.suggestionsList = document.getElementById('suggestions');
         this.maxResultsSelect = document.getElementById('maxResults');
         this.searchBtn = document.getElementById('searchBtn');
         this.searchText = document.getElementById('searchText');
         this.loadingText = document.getElementById('loadingText');
+        this.loadingStage = document.getElementById('loadingStage');
         
         // Mode toggle elements
         this.textModeBtn = document.getElementById('textModeBtn');
@@ -50,6 +53,75 @@ class LabMatcher {
         
         // File removal
         this.removeFileBtn.addEventListener('click', () => this.removeSelectedFile());
+        
+        // Keyword autocomplete
+        this.keywordsInput.addEventListener('input', () => this.scheduleSuggestions());
+        this.keywordsInput.addEventListener('blur', () => {
+            // Delay so a click on a suggestion registers before the list hides
+            setTimeout(() => this.hideSuggestions(), 150);
+        });
+    }
+
+    scheduleSuggestions() {
+        clearTimeout(this.suggestTimer);
+        this.suggestTimer = setTimeout(() => this.fetchSuggestions(), 150);
+    }
+
+    async fetchSuggestions() {
+        const prefix = this.keywordsInput.value.trim();
+        if (prefix.length < 2) {
+            this.hideSuggestions();
+            return;
+        }
+        
+        try {
+            const response = await fetch(`${this.apiBaseUrl}/suggest?q=${encodeURIComponent(prefix)}`);
+            if (!response.ok) {
+                return;
+            }
+            
+            const suggestions = await response.json();
+            if (prefix !== this.keywordsInput.value.trim()) {
+                return;
+            }
+            this.showSuggestions(suggestions);
+        } catch (error) {
+            console.error('Suggestion error:', error);
+        }
+    }
+
+    showSuggestions(suggestions) {
+        this.suggestionsList.innerHTML = '';
+        
+        if (suggestions.length === 0) {
+            this.hideSuggestions();
+            return;
+        }
+        
+        suggestions.forEach(suggestion => {
+            const item = document.createElement('button');
+            item.type = 'button';
+            item.className = 'block w-full text-left px-4 py-2 text-gray-700 hover:bg-umich-maize hover:text-umich-blue transition-colors';
+            item.textContent = suggestion;
+            item.addEventListener('mousedown', (e) => {
+                e.preventDefault();
+                this.selectSuggestion(suggestion);
+            });
+            this.suggestionsList.appendChild(item);
+        });
+        
+        this.suggestionsList.classList.remove('hidden');
+    }
+
+    selectSuggestion(suggestion) {
+        // Search for the suggestion exactly as offered so the server can use its precomputed embedding
+        this.keywordsInput.value = suggestion;
+        this.hideSuggestions();
+        this.searchForm.requestSubmit();
+    }
+
+    hideSuggestions() {
+        this.suggestionsList.classList.add('hidden');
     }
 
     setupFileUpload() {
@@ -179,6 +251,7 @@ class LabMatcher {
     }
 
     async searchWithText() {
+        this.hideSuggestions();
         const keywords = this.keywordsInput.value.trim();
         const maxResults = parseInt(this.maxResultsSelect.value);
         
@@ -217,7 +290,7 @@ class LabMatcher {
         formData.append('max_results', maxResults.toString());
         formData.append('search_type', 'resume');
         
-        const response = await fetch(`${this.apiBaseUrl}/search-labs-with-resume`, {
+        const response = await fetch(`${this.apiBaseUrl}/search-labs-with-resume/stream`, {
             method: 'POST',
             body: formData
         });
@@ -227,7 +300,57 @@ class LabMatcher {
             throw new Error(errorData.detail || 'Resume analysis failed');
         }
         
-        return await response.json();
+        // Render matches as they stream in instead of waiting for the full list
+        const labs = [];
+        this.resultsContainer.innerHTML = '';
+        
+        await this.readEventStream(response, (event) => {
+            if (event.event === 'stage') {
+                this.loadingStage.textContent = LabMatcher.STAGE_LABELS[event.stage] || 'Analyzing and Matching...';
+            } else if (event.event === 'result') {
+                labs.push(event.match);
+                this.resultsContainer.appendChild(this.createLabCard(event.match));
+                this.resultsSection.classList.remove('hidden');
+            } else if (event.event === 'error') {
+                throw new Error(event.detail || 'Resume analysis failed');
+            }
+        });
+        
+        return labs;
+    }
+
+    async readEventStream(response, onEvent) {
+        // Parse a newline-delimited JSON response, one event per line
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        
+        try {
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) {
+                    break;
+                }
+                
+                buffer += decoder.decode(value, { stream: true });
+                const lines = buffer.split('\n');
+                buffer = lines.pop();
+                
+                for (const line of lines) {
+                    if (line.trim()) {
+                        onEvent(JSON.parse(line));
+                    }
+                }
+            }
+            
+            if (buffer.trim()) {
+                onEvent(JSON.parse(buffer));
+            }
+        } catch (error) {
+            // Cancelling the stream lets the server stop working on this search
+            reader.cancel();
+            throw error;
+        }
     }
 
     displayResults(labs) {
@@ -349,6 +472,7 @@ class LabMatcher {
         } else {
             this.searchText.classList.remove('hidden');
             this.loadingText.classList.add('hidden');
+            this.loadingStage.textContent = 'Analyzing and Matching...';
         }
     }
 
@@ -359,6 +483,13 @@ class LabMatcher {
     }
 }
 
+LabMatcher.STAGE_LABELS = {
+    upload: 'Uploading Resume...',
+    parse: 'Reading Resume...',
+    extract: 'Extracting Research Interests...',
+    search: 'Finding Matching Labs...'
+};
+
 // Initialize the application when DOM is loaded
 document.addEventListener('DOMContentLoaded', () => {
     new LabMatcher();